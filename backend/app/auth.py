@@ -1,11 +1,18 @@
+import os
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal
 from app.models.user import User
+from app.services.metrics import AUTH_CACHE_LOOKUPS_TOTAL
+from app.services.worker_pool import BoundedWorkerPool, run_blocking
+from app.utils.cache import TTLCache
 
 # ==========================
 # Security Setup
@@ -14,19 +21,74 @@ SECRET_KEY = "your_secret_key"  # 🔑 Change in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Pinning min = max = default makes passlib flag any hash
+# with a different cost, so changing it rehashes passwords on their next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without
+# blocking the event loop; the cap keeps a login storm from starving scoring.
+BCRYPT_MAX_CONCURRENCY = int(os.getenv("BCRYPT_MAX_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+BCRYPT_QUEUE_SIZE = int(os.getenv("BCRYPT_QUEUE_SIZE", "64"))
+BCRYPT_TIMEOUT_SECONDS = float(os.getenv("BCRYPT_TIMEOUT_SECONDS", "10"))
+
+password_pool = BoundedWorkerPool(kind="thread", size=BCRYPT_MAX_CONCURRENCY, queue_size=BCRYPT_QUEUE_SIZE)
+
+# Verified principals, keyed by token, so authenticated requests skip the DB lookup.
+# An entry never outlives the token's own `exp`.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+principal_cache = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
 
 # ==========================
 # Utility Functions
 # ==========================
+@lru_cache(maxsize=1)
+def pwd_context():
+    # passlib is imported on first use, keeping it off the startup path
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+async def hash_password_async(password: str) -> str:
+    return await run_blocking(get_password_hash, password, timeout=BCRYPT_TIMEOUT_SECONDS, worker_pool=password_pool)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify off the event loop. Returns (valid, new_hash); `new_hash` is set when
+    the stored hash uses an outdated cost and should be replaced.
+    """
+    return await run_blocking(
+        pwd_context().verify_and_update, plain_password, hashed_password,
+        timeout=BCRYPT_TIMEOUT_SECONDS, worker_pool=password_pool,
+    )
+
+def measure_hash_seconds(rounds: int, samples: int = 3) -> float:
+    """
+    Average time to hash one password at the given bcrypt cost, for choosing
+    BCRYPT_ROUNDS on a given machine.
+    """
+    from passlib.context import CryptContext
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    started = time.perf_counter()
+    for _ in range(samples):
+        context.hash("benchmark-password")
+    return (time.perf_counter() - started) / samples
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
@@ -37,7 +99,23 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 # ==========================
 # Authentication Helpers
 # ==========================
-def verify_token(token: str, db: Session) -> User:
+def invalidate_user(user_id: int) -> int:
+    """
+    Drop every cached principal of the user with `user_id`. Matched by id, not
+    username, so a rename still drops the tokens cached under the old name.
+    Returns the number of tokens dropped.
+    """
+    return principal_cache.discard_where(lambda user: user.id == user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+def _load_principal(token: str, db: Session) -> User:
+    """
+    Decode the token, look the user up and cache the result.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
@@ -54,26 +132,29 @@ def verify_token(token: str, db: Session) -> User:
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
+
+    # Detach so the cached instance can be shared safely after this session closes
+    db.expunge(user)
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    principal_cache.set(token, user, ttl=expires_in)
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    return verify_token(token, db)
+def _cached_principal(token: str) -> Optional[User]:
+    cached = principal_cache.get(token)
+    # Exported on /metrics; /auth/cache-stats shows the same counts for this process
+    AUTH_CACHE_LOOKUPS_TOTAL.labels(result="miss" if cached is None else "hit").inc()
+    return cached
 
-# ==========================
-# Login Route
-# ==========================
-@router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+def verify_token(token: str, db: Session) -> User:
+    cached = _cached_principal(token)
+    if cached is not None:
+        return cached
+    return _load_principal(token, db)
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    # A session is only opened when the principal is not already cached
+    cached = _cached_principal(token)
+    if cached is not None:
+        return cached
+    with SessionLocal() as db:
+        return _load_principal(token, db)
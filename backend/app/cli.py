@@ -0,0 +1,246 @@
+"""
+Offline batch scorer built on the same code path as the /csv endpoint.
+
+    python -m app.cli data/2024-*.csv exports/ --model General --workers 8
+
+Each input is read in partitions that are scored in parallel worker processes
+(each worker loads the model once) and written next to the input, or to
+--output-dir, as <name>.predicted.csv / .parquet.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from app.services.model_service import (
+    ModelChoice, MODEL_MAPPING, CSV_CHUNK_ROWS, PREDICTION_COLUMN, get_decision_threshold, score_frame,
+)
+from app.services.model_registry import get_model, model_input_errors
+from app.services.schema import SchemaValidationError, check_numeric, read_columns, read_kwargs, validate_columns
+from app.utils.logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".csv", ".parquet")
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """
+    Resolve files, directories (their CSV/Parquet files) and glob patterns.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(os.path.join(item, name) for name in os.listdir(item))
+        else:
+            candidates = sorted(glob.glob(item)) or [item]
+        for path in candidates:
+            if path.endswith(".predicted.csv") or path.endswith(".predicted.parquet"):
+                continue  # Never re-score our own outputs
+            if os.path.isfile(path) and path.endswith(SUPPORTED_EXTENSIONS):
+                paths.append(path)
+            elif not os.path.isdir(item):
+                raise FileNotFoundError(f"Input not found or unsupported (expected .csv/.parquet): {path}")
+    return paths
+
+
+def output_path_for(input_path: str, output_dir: Optional[str]) -> str:
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    directory = output_dir or os.path.dirname(input_path)
+    return os.path.join(directory, f"{stem}.predicted{ext}")
+
+
+def iter_partitions(path: str, model_name: str, rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield the input in partitions of `rows` rows, numeric features checked.
+    """
+    schema = get_model(model_name).schema
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        if schema is not None:
+            validate_columns(schema, parquet_file.schema_arrow.names)
+        for batch in parquet_file.iter_batches(batch_size=rows):
+            frame = batch.to_pandas()
+            if schema is not None:
+                check_numeric(frame, schema)
+            yield frame
+    else:
+        kwargs = {}
+        if schema is not None:
+            columns = read_columns(path)
+            validate_columns(schema, columns)
+            kwargs = read_kwargs(schema, columns)
+        for frame in pd.read_csv(path, chunksize=rows, **kwargs):
+            if schema is not None:
+                check_numeric(frame, schema)
+            yield frame
+
+
+def _init_worker(model_name: str) -> None:
+    # Load the model once per worker process, not once per partition
+    get_model(model_name)
+
+
+def _score_partition(frame: pd.DataFrame, model_name: str, threshold: float, row_offset: int) -> pd.DataFrame:
+    try:
+        return score_frame(frame, model_name, threshold, row_offset=row_offset)
+    except model_input_errors() as e:
+        # Reported like any other bad input, so only this file fails
+        raise ValueError(f"The model rejected rows {row_offset + 1}-{row_offset + len(frame)}: {e}") from e
+
+
+class _OutputWriter:
+    """
+    Appends scored partitions to a CSV or Parquet file, in input order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet_writer = None
+        self._csv_file = None if path.endswith(".parquet") else open(path, "w", newline="")
+        self._header_written = False
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self._csv_file is not None:
+            frame.to_csv(self._csv_file, index=False, header=not self._header_written)
+            self._header_written = True
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+
+    def close(self) -> None:
+        if self._csv_file is not None:
+            self._csv_file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(path: str, output_path: str, model_name: str, threshold: float,
+               executor: ProcessPoolExecutor, workers: int, rows: int) -> dict:
+    """
+    Score one file across the worker pool, keeping at most 2 partitions per
+    worker in flight so memory stays bounded by the partition size. On
+    failure the partial output is removed and the error re-raised.
+    """
+    started = time.perf_counter()
+    class_counts = Counter()
+    rows_scored = 0
+    submitted_rows = 0
+    pending = deque()
+    writer = _OutputWriter(output_path)
+
+    def drain_one() -> None:
+        nonlocal rows_scored
+        scored = pending.popleft().result()
+        writer.write(scored)
+        class_counts.update(scored[PREDICTION_COLUMN].value_counts().to_dict())
+        rows_scored += len(scored)
+
+    try:
+        for partition in iter_partitions(path, model_name, rows):
+            pending.append(executor.submit(_score_partition, partition, model_name, threshold, submitted_rows))
+            submitted_rows += len(partition)
+            if len(pending) >= workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        writer.close()
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    writer.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        "input": path,
+        "output": output_path,
+        "rows": rows_scored,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows_scored / seconds, 1) if seconds > 0 else None,
+        "class_distribution": {str(k): v for k, v in class_counts.items()},
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Score CSV/Parquet files offline.")
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns to score")
+    parser.add_argument("--model", choices=[c.value for c in ModelChoice], default=ModelChoice.general.value)
+    parser.add_argument("--threshold", type=float, default=None, help="Churn decision threshold (default: model's configured value)")
+    parser.add_argument("--output-dir", default=None, help="Write outputs here instead of next to each input")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    parser.add_argument("--partition-rows", type=int, default=CSV_CHUNK_ROWS, help="Rows per partition sent to a worker")
+    parser.add_argument("--summary", default=None, help="Also write the JSON summary to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    model_name = MODEL_MAPPING[ModelChoice(args.model)]
+    threshold = args.threshold if args.threshold is not None else get_decision_threshold(model_name)
+
+    try:
+        paths = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        logger.error("%s", e)
+        return 2
+    if not paths:
+        logger.error("No .csv or .parquet inputs found")
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    files = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(model_name,)) as executor:
+        for path in paths:
+            try:
+                files.append(score_file(
+                    path, output_path_for(path, args.output_dir), model_name, threshold,
+                    executor, args.workers, args.partition_rows,
+                ))
+            except (SchemaValidationError, ValueError, OSError) as e:
+                failed += 1
+                detail = e.report if isinstance(e, SchemaValidationError) else str(e)
+                files.append({"input": path, "error": detail})
+                logger.error("Failed to score %s: %s", path, detail, extra={"input": path})
+
+    seconds = time.perf_counter() - started
+    total_rows = sum(f.get("rows", 0) for f in files)
+    summary = {
+        "model_used": model_name,
+        "decision_threshold": threshold,
+        "workers": args.workers,
+        "files": files,
+        "total_rows": total_rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(total_rows / seconds, 1) if seconds > 0 else None,
+    }
+    print(json.dumps(summary, indent=2))
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,41 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import predict, auth_routes, chatbot_routes, report_routes
+from app.utils.logging_setup import configure_logging
 
-app = FastAPI()
+configure_logging()  # Before the app modules below start logging
+
+from app.database import engine
+from app.routes import predict, auth_routes, chatbot_routes, report_routes, job_routes, metrics_routes, health_routes, result_routes, analytics_routes
+from app.services.readiness import start_prewarm
+from app.services.result_store import cleanup_periodically
+from app.services.worker_pool import pool
+from app.services.job_service import job_pool, resume_pending_jobs
+from app.auth import password_pool
+from app.services.chatbot_service import chat_pool
+from app.services.micro_batcher import batch_pool
+
+# Load all models at startup (in the background, see PREWARM_IN_BACKGROUND)
+# instead of on the first request for each one
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup and job recovery run in the prewarm, retried until the database is reachable
+    start_prewarm(PRELOAD_MODELS, on_database_ready=resume_pending_jobs)
+    cleanup_task = asyncio.create_task(cleanup_periodically())
+    yield
+    cleanup_task.cancel()
+    pool.shutdown()
+    job_pool.shutdown()
+    password_pool.shutdown()
+    chat_pool.shutdown()
+    batch_pool.shutdown()
+    engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS for frontend dev servers
 app.add_middleware(
@@ -23,3 +56,8 @@ app.include_router(auth_routes.router)
 app.include_router(predict.router)
 app.include_router(chatbot_routes.router)
 app.include_router(report_routes.router)
+app.include_router(job_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(health_routes.router)
+app.include_router(result_routes.router)
+app.include_router(analytics_routes.router)
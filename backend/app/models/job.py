@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from app.database import Base
+
+class PredictionJob(Base):
+    __tablename__ = "prediction_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    username = Column(String, index=True, nullable=False)
+    model_name = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    input_path = Column(String, nullable=False)
+    output_path = Column(String, nullable=False)
+    status = Column(String, index=True, nullable=False, default="queued")  # queued | running | completed | failed
+    rows_total = Column(Integer, nullable=True)
+    rows_scored = Column(Integer, nullable=False, default=0)
+    class_distribution = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Lease of the running job: which process runs it and when it last reported progress
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from app.database import Base
+
+class StoredResult(Base):
+    """
+    Summary of a scored upload, kept so reports can be built by result id.
+    The scored rows themselves live in an Arrow file at `result_path`
+    (see app.services.result_store) until retention drops them.
+    """
+    __tablename__ = "prediction_results"
+
+    id = Column(String, primary_key=True, index=True)
+    username = Column(String, index=True, nullable=False)
+    model_name = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    prediction_column = Column(String, nullable=False)
+    decision_threshold = Column(Float, nullable=True)
+    total_records = Column(Integer, nullable=False)
+    class_distribution = Column(JSON, nullable=False)
+    probability_bins = Column(JSON, nullable=True)  # {"counts": [...], "edges": [...]}
+    sample = Column(JSON, nullable=False)  # First rows, for the report table
+    result_path = Column(String, nullable=True)
+    result_bytes = Column(Integer, nullable=True)
+    result_columns = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.models.user import User
+from app.auth import get_current_user
+from app.services.analytics_service import analytics_cache, result_analytics
+from app.services.result_store import get_user_result, result_index_entry
+from app.utils.result_encoding import check_columns, parse_columns
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+MAX_DIMENSIONS = 10
+
+@router.get("/cache/stats")
+async def analytics_cache_stats(current_user: User = Depends(get_current_user)):
+    return analytics_cache.stats()
+
+@router.get("/{result_id}")
+async def get_result_analytics(
+    result_id: str,
+    dimensions: Optional[str] = Query(None, description="Comma-separated columns to segment churn by, e.g. Geography,Gender"),
+    deciles: bool = Query(True, description="Include churn-probability deciles"),
+    top_n: int = Query(20, ge=0, le=1000, description="At-risk customers to list (0 for none)"),
+    columns: Optional[str] = Query(None, description="Extra columns to include for the at-risk customers"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Dashboard aggregates for a stored result: overall churn rate, churn rate
+    and mean churn probability per segment, probability deciles and the
+    customers most likely to churn. Computed from the stored rows without
+    sending them to the browser, and cached per result and dimension.
+    """
+    stored = await run_in_threadpool(get_user_result, db, result_id, current_user.username)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    if stored.result_path is None:
+        raise HTTPException(status_code=404, detail="The rows of this result are not stored (still being written or removed by retention)")
+
+    available = stored.result_columns or []
+    requested_dimensions = list(dict.fromkeys(parse_columns(dimensions) or []))
+    if len(requested_dimensions) > MAX_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DIMENSIONS} dimensions per request")
+    top_columns = list(dict.fromkeys(parse_columns(columns) or []))
+    check_columns(requested_dimensions + top_columns, available)
+
+    try:
+        analytics = await result_analytics(
+            stored.id, stored.result_path, available, requested_dimensions,
+            deciles=deciles, top_n=top_n, top_columns=top_columns,
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="The rows of this result are no longer stored")
+    return {**result_index_entry(stored), **analytics}
@@ -1,33 +1,68 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
-from app.database import get_db, Base, engine
+from app.database import get_db
 from app.models.user import User
-from app.auth import get_password_hash, verify_password, create_access_token
-
-# Create DB tables
-Base.metadata.create_all(bind=engine)
+from app.auth import (
+    hash_password_async, verify_and_update_password, create_access_token, get_current_user, principal_cache,
+)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# The handlers are async so bcrypt can run on the bounded password pool; their
+# (blocking) DB calls go to the threadpool so they never stall the event loop.
+def _is_registered(db: Session, username: str, email: str) -> bool:
+    return db.query(User).filter((User.username == username) | (User.email == email)).first() is not None
+
+def _add_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+
+def _find_user(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+def _update_password_hash(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.commit()
+
 # Register
 @router.post("/register")
-def register(username: str, email: str, password: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter((User.username == username) | (User.email == email)).first()
-    if user:
+async def register(username: str, email: str, password: str, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_is_registered, db, username, email):
         raise HTTPException(status_code=400, detail="Username or email already registered")
-    hashed_pw = get_password_hash(password)
-    new_user = User(username=username, email=email, hashed_password=hashed_pw)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_pw = await hash_password_async(password)
+    await run_in_threadpool(_add_user, db, User(username=username, email=email, hashed_password=hashed_pw))
     return {"msg": "User registered successfully"}
 
 # Login
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid username or password")
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    if not user:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if new_hash:
+        # Stored hash used an old bcrypt cost; upgrade it transparently
+        await run_in_threadpool(_update_password_hash, db, user, new_hash)
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/cache-stats")
+def auth_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Hit rate and size of the verified-token cache.
+    """
+    return principal_cache.stats()
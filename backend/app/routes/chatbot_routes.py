@@ -1,16 +1,45 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.chatbot_service import get_gemini_response
+from app.services.chatbot_service import (
+    ChatbotUnavailableError, chat_stats, get_chat_response, stream_chat_response,
+)
+from app.services.worker_pool import PoolSaturatedError
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     message: str
+    stream: bool = False
 
 @router.post("/chat")
 async def chat_with_gemini(request: ChatRequest):
+    """
+    Answer a chat message. With `stream=true` the answer is sent as plain
+    text chunks as the provider produces them.
+    """
     try:
-        response = await get_gemini_response(request.message)
+        if request.stream:
+            chunks = await stream_chat_response(request.message)
+            return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+        response = await get_chat_response(request.message)
         return {"response": response}
+    except HTTPException:
+        raise
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Chatbot is busy, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    except ChatbotUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chat/stats")
+async def chatbot_stats():
+    """
+    Active provider, in-flight calls and response cache counters.
+    """
+    return chat_stats()
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.readiness import readiness, readiness_report
+
+router = APIRouter()
+
+@router.get("/healthz", tags=["Monitoring"])
+async def healthz():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz", tags=["Monitoring"])
+async def readyz():
+    """
+    Readiness: 200 once the database and (with PRELOAD_MODELS) every model
+    are warm, 503 while warming up or if one of them failed. The body lists
+    each subsystem's state and the loaded models.
+    """
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness_report())
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+import os
+from typing import Optional
+import pandas as pd
+
+from app.database import get_db
+from app.models.job import PredictionJob
+from app.models.user import User
+from app.auth import get_current_user
+from app.services.model_service import ModelChoice, MODEL_MAPPING
+from app.services.job_service import new_job_paths, create_job, delete_job, enqueue_job, job_status
+from app.services.metrics import PREDICTIONS_TOTAL, timed
+from app.services.worker_pool import PoolSaturatedError
+from app.utils.file_handler import save_upload_or_4xx, upload_file_name
+from app.services.result_store import get_user_result, read_result_page
+from app.utils.result_encoding import ResultFormat, check_columns, parse_columns, encode_frame
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def _get_user_job(job_id: str, db: Session, current_user: User) -> PredictionJob:
+    job = db.get(PredictionJob, job_id)
+    if job is None or job.username != current_user.username:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _require_completed(job: PredictionJob) -> None:
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}; results are available once it has completed",
+        )
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    model_choice: ModelChoice = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Submit a CSV (optionally gzip- or zstd-compressed) for background scoring.
+    Returns a job id to poll immediately.
+    """
+    PREDICTIONS_TOTAL.labels(model_choice=model_choice.value, mode="job").inc()
+    job_id, input_path, output_path = new_job_paths()
+    with timed("upload_read"):
+        await save_upload_or_4xx(file, input_path)
+
+    job = await run_in_threadpool(
+        create_job, db, job_id, current_user.username, MODEL_MAPPING[model_choice],
+        upload_file_name(file), input_path, output_path,
+    )
+    try:
+        enqueue_job(job.id)
+    except PoolSaturatedError:
+        await run_in_threadpool(delete_job, db, job)
+        os.remove(input_path)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many prediction jobs queued, please retry later",
+            headers={"Retry-After": "30"},
+        )
+    return job_status(job)
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Poll a job's status, progress and estimated time remaining.
+    """
+    return job_status(await run_in_threadpool(_get_user_job, job_id, db, current_user))
+
+@router.get("/{job_id}/results")
+def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    format: ResultFormat = Query(ResultFormat.records),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Fetch one page of a completed job's scored rows.
+    """
+    job = _get_user_job(job_id, db, current_user)
+    _require_completed(job)
+
+    requested_columns = parse_columns(columns)
+    stored = get_user_result(db, job.id, current_user.username)
+    if stored is not None and stored.result_path is not None and os.path.exists(stored.result_path):
+        # Columnar copy: only the batches and columns of the page are read
+        if requested_columns:
+            requested_columns = list(dict.fromkeys(requested_columns))
+            check_columns(requested_columns, stored.result_columns or [])
+        page = read_result_page(stored.result_path, offset, limit, requested_columns)
+    else:
+        # Only the requested window and columns are parsed, never the whole output file
+        try:
+            page = pd.read_csv(
+                job.output_path, skiprows=range(1, offset + 1), nrows=limit, usecols=requested_columns
+            )
+        except ValueError as e:  # Raised by pandas for unknown usecols
+            raise HTTPException(status_code=400, detail=str(e))
+    with timed("serialization"):
+        return encode_frame(page, format, meta={
+            "job_id": job.id,
+            "offset": offset,
+            "limit": limit,
+            "total_records": job.rows_total,
+        })
+
+@router.get("/{job_id}/download")
+async def download_job_results(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Download a completed job's scored rows as a CSV file.
+    """
+    job = await run_in_threadpool(_get_user_job, job_id, db, current_user)
+    _require_completed(job)
+    return FileResponse(job.output_path, media_type="text/csv", filename=f"predictions_{job.id}.csv")
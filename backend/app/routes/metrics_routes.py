@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from app.services.metrics import metrics_response
+
+router = APIRouter()
+
+@router.get("/metrics", tags=["Monitoring"], include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms and request,
+    rows-scored and error counters.
+    """
+    return metrics_response()
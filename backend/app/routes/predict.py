@@ -1,87 +1,312 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, BackgroundTasks, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse
+from sqlalchemy.orm import Session
 import os
-import pandas as pd
+import uuid
 from datetime import datetime
-from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from pydantic import BaseModel, Field
 
-from app.services.model_service import predict_from_csv
+from app.services.model_service import (
+    ModelChoice, MODEL_MAPPING, PREDICTION_COLUMN, PredictionResult, predict_from_csv_chunked, predict_from_csv_multi,
+    save_prediction_result,
+)
+from app.database import get_db
+from app.services.schema import SchemaValidationError, read_columns
+from app.services.result_store import (
+    OUTPUT_DIR, RESULT_STORE_ENABLED, get_user_result, persist_result_csv, persist_result_frame, record_result,
+)
+from app.services.result_cache import predict_from_csv_cached, result_cache
+from app.services.model_registry import registry
+from app.services.worker_pool import JobTimeoutError, PoolSaturatedError, run_blocking
+from app.services.micro_batcher import MICROBATCH_MAX_ROWS, score_records
+from app.services.metrics import PREDICTIONS_TOTAL, timed
 from app.auth import get_current_user
 from app.models.user import User
+from app.utils.file_handler import spool_upload
+from app.utils.result_encoding import JSON_FORMATS, ResultFormat, check_columns, parse_columns, select_page, encode_frame, frame_payload
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
-OUTPUT_DIR = "outputs"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-class ModelChoice(str, Enum):
-    general = "General"
-    life_insurance = "Life_Insurance"
-    automobile_insurance = "Automobile_Insurance"
+# Columns added by scoring rather than read from the upload
+GENERATED_COLUMNS = ("User_ID", PREDICTION_COLUMN, "churn_probability")
+
+# Columns each model adds to a /csv/multi row set, prefixed with its ModelChoice
+MODEL_COLUMNS = (PREDICTION_COLUMN, "churn_probability")
+
+# Write each /csv result to OUTPUT_DIR after the response has been sent
+PERSIST_PREDICTIONS = os.getenv("PERSIST_PREDICTIONS", "false").lower() in ("1", "true", "yes")
 
 @router.post("/csv", tags=["Prediction"])
 async def predict_csv(
+    background_tasks: BackgroundTasks,
     model_choice: ModelChoice = Form(...),
     file: UploadFile = File(...),
+    stream: bool = Form(False),
+    threshold: Optional[float] = Form(None, ge=0, le=1, description="Churn decision threshold; defaults to the model's configured value"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. User_ID,Predicted_Target"),
+    format: ResultFormat = Query(ResultFormat.records),
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)  # 👈 ensures JWT auth
 ):
     """
     Upload a CSV → run ML model → return predictions as JSON.
     Only accessible if user is authenticated (JWT required).
+    The CSV may be gzip- or zstd-compressed; uploads larger than
+    UPLOAD_MAX_BYTES (after decompression) are rejected with 413.
+
+    `offset`/`limit` page the returned rows and `columns` projects them; by
+    default every row and column is returned. `format` selects the encoding.
+
+    With `stream=true` the file is scored in fixed-size chunks and only the
+    summary is returned; the scored rows are fetched from `download_url`.
+
+    Either way the result summary is stored, and `report_url` builds the PDF
+    report from it without re-sending the rows. The scored rows are written
+    to the result store after the response; `rows_url` pages through them.
     """
 
-    model_mapping = {
-        ModelChoice.general: "catboost_model.cbm",
-        ModelChoice.life_insurance: "life_insurance.cbm",
-        ModelChoice.automobile_insurance: "automobile_insurance.joblib",
-    }
-    model_name = model_mapping[model_choice]
-
-    # Save uploaded file
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
-
-    # Run prediction with ML model → CSV file path
-    output_csv = predict_from_csv(file_path, model_name, OUTPUT_DIR)
-
-    # Convert output CSV to JSON
-    df = pd.read_csv(output_csv)
-    records = df.to_dict(orient="records")  # [{col1:val1, col2:val2}, ...]
-
-    # Determine prediction column robustly
-    candidate_prediction_columns = [
-        "prediction",
-        "Predicted_Target",
-        "predicted",
-        "Predicted",
-        "target",
-        "label",
-    ]
-
-    prediction_col = next((c for c in candidate_prediction_columns if c in df.columns), None)
-
-    if prediction_col is None:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Prediction column not found in output CSV.",
-                "expected_any_of": candidate_prediction_columns,
-                "available_columns": list(df.columns),
-                "output_csv": output_csv,
-            },
+    model_name = MODEL_MAPPING[model_choice]
+    PREDICTIONS_TOTAL.labels(model_choice=model_choice.value, mode="stream" if stream else "csv").inc()
+
+    # Spool the upload to a file of its own; it is deleted once scored
+    with timed("upload_read"):
+        upload = await spool_upload(file)
+
+    if stream:
+        output_id = uuid.uuid4().hex
+        try:
+            summary = await run_blocking(
+                predict_from_csv_chunked, upload.path, model_name, os.path.join(OUTPUT_DIR, f"{output_id}.csv"),
+                threshold=threshold, source_name=upload.file_name,
+            )
+        except SchemaValidationError as e:
+            raise HTTPException(status_code=422, detail=e.report)
+        finally:
+            upload.discard()
+        await run_in_threadpool(record_result, db, output_id, current_user.username, upload.file_name, summary)
+        if RESULT_STORE_ENABLED:
+            background_tasks.add_task(persist_result_csv, output_id, summary["output_path"])
+        return JSONResponse(content={
+            "user": current_user.username,
+            "timestamp": datetime.now().isoformat(),
+            "result_id": output_id,
+            "total_records": summary["total_records"],
+            "class_distribution": summary["class_distribution"],
+            "prediction_column": summary["prediction_column"],
+            "model_used": model_name,
+            "decision_threshold": summary["decision_threshold"],
+            "download_url": f"/csv/download/{output_id}",
+            "rows_url": f"/results/{output_id}",
+            "report_url": f"/report/pdf/{output_id}",
+        })
+
+    # With a projection, only the model features and the requested input columns are parsed
+    requested_columns = parse_columns(columns)
+    input_columns = None
+    if requested_columns is not None:
+        input_columns = [c for c in requested_columns if c not in GENERATED_COLUMNS]
+
+    # Run prediction with ML model → in-memory result
+    try:
+        if requested_columns is not None:
+            # Reject an unknown projection before scoring and storing the result
+            check_columns(requested_columns, await run_in_threadpool(read_columns, upload.path) + list(GENERATED_COLUMNS))
+        result = await run_blocking(
+            predict_from_csv_cached, upload.path, model_name, upload.sha256, threshold, input_columns, upload.file_name
         )
+    except SchemaValidationError as e:
+        raise HTTPException(status_code=422, detail=e.report)
+    finally:
+        upload.discard()
+    await run_in_threadpool(
+        record_result, db, result.result_id, current_user.username, upload.file_name, result.summary()
+    )
+    if RESULT_STORE_ENABLED:
+        background_tasks.add_task(persist_result_frame, result.result_id, result.frame)
+    if PERSIST_PREDICTIONS:
+        background_tasks.add_task(save_prediction_result, result, OUTPUT_DIR)
+
+    page = select_page(result.frame, offset, limit, requested_columns)
+    with timed("serialization"):
+        return encode_frame(page, format, meta={
+            "user": current_user.username,
+            "timestamp": datetime.now().isoformat(),
+            "result_id": result.result_id,
+            "total_records": result.total_records,
+            "offset": offset,
+            "limit": limit,
+            "class_distribution": result.class_distribution,  # for pie chart
+            "prediction_column": result.prediction_column,
+            "model_used": model_name,
+            "decision_threshold": result.decision_threshold,
+            "rows_url": f"/results/{result.result_id}",
+            "report_url": f"/report/pdf/{result.result_id}",
+        })
+
+def _side_by_side(data: pd.DataFrame, results: Dict[ModelChoice, PredictionResult],
+                  offset: int, limit: Optional[int]) -> pd.DataFrame:
+    """
+    One page of input rows followed by each model's columns, prefixed with
+    the model choice (e.g. `Life_Insurance.Predicted_Target`).
+    """
+    rows = slice(offset, None if limit is None else offset + limit)
+    first = next(iter(results.values()))
+    parts = [first.frame[["User_ID"]].iloc[rows], data.iloc[rows]]
+    for choice, result in results.items():
+        parts.append(result.frame.iloc[rows].drop(columns="User_ID").add_prefix(f"{choice.value}."))
+    return pd.concat(parts, axis=1)
+
+@router.post("/csv/multi", tags=["Prediction"])
+async def predict_csv_multi(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    model_choices: List[ModelChoice] = Form(...),
+    threshold: Optional[float] = Form(None, ge=0, le=1, description="Churn decision threshold for every model; defaults to each model's configured value"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. User_ID,General.Predicted_Target"),
+    format: ResultFormat = Query(ResultFormat.records),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Score one or more CSVs with several models in a single request.
 
-    # Example: return class distribution for pie chart
-    class_counts = df[prediction_col].value_counts().to_dict()
+    Each file is parsed once and scored by each selected model in turn.
+    Every file gets one row set with the input columns and per-model
+    `<ModelChoice>.Predicted_Target` / `<ModelChoice>.churn_probability`
+    columns, plus each model's distribution and stored result id.
+    """
+    if format not in JSON_FORMATS:
+        raise HTTPException(status_code=400, detail="Multi-file results are returned as records or columnar JSON")
+    choices = list(dict.fromkeys(model_choices))  # De-duplicate, keep order
+    model_names = [MODEL_MAPPING[choice] for choice in choices]
+    for choice in choices:
+        PREDICTIONS_TOTAL.labels(model_choice=choice.value, mode="multi").inc()
+
+    requested_columns = parse_columns(columns)
+    input_columns = None
+    if requested_columns is not None:
+        prefixes = tuple(f"{choice.value}." for choice in choices)
+        input_columns = [c for c in requested_columns if c != "User_ID" and not c.startswith(prefixes)]
+
+    file_results = []
+    for file in files:
+        with timed("upload_read"):
+            upload = await spool_upload(file)
+        try:
+            if requested_columns is not None:
+                generated = ["User_ID"] + [f"{choice.value}.{c}" for choice in choices for c in MODEL_COLUMNS]
+                check_columns(requested_columns, await run_in_threadpool(read_columns, upload.path) + generated)
+            data, by_model = await run_blocking(
+                predict_from_csv_multi, upload.path, model_names, threshold, input_columns, upload.file_name
+            )
+        except SchemaValidationError as e:
+            raise HTTPException(status_code=422, detail={"file_name": upload.file_name, **e.report})
+        finally:
+            upload.discard()
+        results = {choice: by_model[MODEL_MAPPING[choice]] for choice in choices}
+
+        models = {}
+        for choice, result in results.items():
+            await run_in_threadpool(
+                record_result, db, result.result_id, current_user.username, upload.file_name, result.summary()
+            )
+            if RESULT_STORE_ENABLED:
+                # Stored like a single-model /csv result: User_ID, the input columns, then this model's columns
+                frame = pd.concat([result.frame[["User_ID"]], data, result.frame.drop(columns="User_ID")], axis=1)
+                background_tasks.add_task(persist_result_frame, result.result_id, frame)
+            models[choice.value] = {
+                "result_id": result.result_id,
+                "model_used": result.model_used,
+                "decision_threshold": result.decision_threshold,
+                "class_distribution": result.class_distribution,
+                "rows_url": f"/results/{result.result_id}",
+                "report_url": f"/report/pdf/{result.result_id}",
+            }
+
+        page = select_page(_side_by_side(data, results, offset, limit), columns=requested_columns)
+        with timed("serialization"):
+            file_results.append({
+                "file_name": upload.file_name,
+                "total_records": len(data),
+                "models": models,
+                **frame_payload(page, format),
+            })
 
     return JSONResponse(content={
         "user": current_user.username,
         "timestamp": datetime.now().isoformat(),
-        "records": records,           # full prediction rows
-        "class_distribution": class_counts,  # for pie chart
-        "prediction_column": prediction_col,
-        "model_used": model_name,
-    })
\ No newline at end of file
+        "offset": offset,
+        "limit": limit,
+        "prediction_column": PREDICTION_COLUMN,
+        "files": file_results,
+    })
+
+class RowsRequest(BaseModel):
+    model_choice: ModelChoice
+    records: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MICROBATCH_MAX_ROWS)
+    threshold: Optional[float] = Field(None, ge=0, le=1)
+
+@router.post("/predict/rows", tags=["Prediction"])
+async def predict_rows(request: RowsRequest, current_user: User = Depends(get_current_user)):
+    """
+    Score one or a few customers given as JSON feature records.
+
+    Concurrent requests for the same model are coalesced into micro-batches
+    and scored with a single model call; `batch_rows` reports how many rows
+    shared that call. Predictions are returned in the order of `records`.
+    The automobile demo override only applies to uploaded files.
+    """
+    PREDICTIONS_TOTAL.labels(model_choice=request.model_choice.value, mode="rows").inc()
+    try:
+        result = await score_records(request.records, MODEL_MAPPING[request.model_choice], request.threshold)
+    except SchemaValidationError as e:
+        raise HTTPException(status_code=422, detail=e.report)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail={"error": "Records could not be converted to the model's feature types", "message": str(e)})
+    except PoolSaturatedError:
+        raise HTTPException(status_code=429, detail="Server is busy scoring other rows, please retry shortly",
+                            headers={"Retry-After": "1"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return {"user": current_user.username, **result}
+
+@router.get("/csv/download/{output_id}", tags=["Prediction"])
+def download_predictions(output_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Download the scored CSV produced by one of the current user's streaming `/csv` runs.
+    """
+    try:
+        output_id = uuid.UUID(output_id).hex  # Rejects anything that is not a plain id
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Prediction output not found")
+    # Other users' outputs look exactly like missing ones
+    if get_user_result(db, output_id, current_user.username) is None:
+        raise HTTPException(status_code=404, detail="Prediction output not found")
+    output_path = os.path.join(OUTPUT_DIR, f"{output_id}.csv")
+    if not os.path.exists(output_path):
+        raise HTTPException(status_code=404, detail="Prediction output not found")
+    return FileResponse(output_path, media_type="text/csv", filename="predictions.csv")
+
+@router.get("/csv/cache", tags=["Prediction"])
+async def result_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Hit/miss/eviction counters and size of the prediction result cache.
+    """
+    return result_cache.stats()
+
+@router.get("/models", tags=["Prediction"])
+async def list_models(current_user: User = Depends(get_current_user)):
+    """
+    Report which models are loaded in this worker, with load time and memory.
+    """
+    return {"models": registry.stats()}
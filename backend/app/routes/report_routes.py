@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import io
 from datetime import datetime
 
-from app.services.report_service import generate_report
+from app.database import get_db
+from app.services.result_store import get_user_result, report_inputs
+from app.services.worker_pool import run_blocking
 from app.auth import get_current_user
 from app.models.user import User
 
 router = APIRouter()
 
+def _report_service():
+    # matplotlib and fpdf load on the first report (or the startup prewarm), not at app import
+    from app.services import report_service
+    return report_service
+
 @router.get("/report", tags=["Report"])
 async def get_simple_report(current_user: User = Depends(get_current_user)):
     """
@@ -57,12 +66,35 @@ async def get_pdf_report(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Generate a PDF report from prediction data.
+    Generate a PDF report from prediction data posted by the client.
+    Prefer `GET /report/pdf/{result_id}`, which does not re-send the rows.
     """
-    pdf_bytes = generate_report(report_data.dict())
+    pdf_bytes = await run_blocking(_report_service().generate_report, report_data.dict())
     
     return StreamingResponse(
         io.BytesIO(pdf_bytes),
         media_type="application/pdf",
         headers={"Content-Disposition": "attachment; filename=prediction_report.pdf"}
-    )
\ No newline at end of file
+    )
+
+@router.get("/report/pdf/{result_id}", tags=["Report"])
+async def get_pdf_report_for_result(
+    result_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate a PDF report for a stored prediction result (`result_id` from
+    `/csv`, or a completed job id) from its precomputed summary.
+    """
+    stored = await run_in_threadpool(get_user_result, db, result_id, current_user.username)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Prediction result not found")
+
+    pdf_bytes = await run_blocking(_report_service().generate_report_from_summary, report_inputs(stored))
+
+    return StreamingResponse(
+        io.BytesIO(pdf_bytes),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=prediction_report_{result_id}.pdf"}
+    )
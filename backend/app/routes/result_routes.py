@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.models.user import User
+from app.auth import get_current_user
+from app.services.result_store import (
+    explanations_file_path, get_user_result, list_user_results, read_result_page, result_index_entry,
+)
+from app.services.explanation_service import (
+    EXPLAIN_MAX_ROWS, EXPLAIN_TOP_K, SELECTIONS, ExplanationUnavailableError, get_explanations,
+)
+from app.services.metrics import timed
+from app.services.worker_pool import run_blocking
+from app.utils.result_encoding import ResultFormat, check_columns, encode_frame, parse_columns
+
+router = APIRouter(prefix="/results", tags=["Results"])
+
+@router.get("")
+async def list_results(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The current user's stored results, newest first: model, file, row count,
+    class distribution and where to fetch the rows or the PDF report.
+    """
+    results = await run_in_threadpool(list_user_results, db, current_user.username, offset, limit)
+    return {"offset": offset, "limit": limit, "results": [result_index_entry(stored) for stored in results]}
+
+async def _stored_rows_or_404(db: Session, result_id: str, username: str):
+    stored = await run_in_threadpool(get_user_result, db, result_id, username)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    if stored.result_path is None:
+        raise HTTPException(status_code=404, detail="The rows of this result are not stored (still being written or removed by retention)")
+    return stored
+
+@router.get("/{result_id}")
+async def get_result_rows(
+    result_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(1000, ge=1, le=100_000),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    format: ResultFormat = Query(ResultFormat.records),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Re-serve one page of a stored result's scored rows without re-scoring.
+    Only the record batches and columns of the page are read from disk.
+    """
+    stored = await _stored_rows_or_404(db, result_id, current_user.username)
+
+    requested_columns = parse_columns(columns)
+    if requested_columns:
+        requested_columns = list(dict.fromkeys(requested_columns))
+        check_columns(requested_columns, stored.result_columns or [])
+    try:
+        page = await run_blocking(read_result_page, stored.result_path, offset, limit, requested_columns)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="The rows of this result are no longer stored")
+    with timed("serialization"):
+        return encode_frame(page, format, meta={
+            **result_index_entry(stored),
+            "offset": offset,
+            "limit": limit,
+        })
+
+@router.get("/{result_id}/explanations")
+async def get_result_explanations(
+    result_id: str,
+    selection: str = Query("top", description="'top' for the riskiest customers or 'sample' for a random sample"),
+    n: int = Query(100, ge=1, le=EXPLAIN_MAX_ROWS, description="Customers to explain"),
+    k: int = Query(EXPLAIN_TOP_K, ge=1, le=20, description="Reasons per customer"),
+    seed: int = Query(0, description="Seed of the random sample"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Why customers are flagged: the `k` features with the largest SHAP
+    contributions (log-odds; positive pushes towards churn) for `n` rows of a
+    stored result. Computed on first request and cached next to the result,
+    so reports and later requests for the same or fewer rows reuse it.
+    """
+    if selection not in SELECTIONS:
+        raise HTTPException(status_code=400, detail=f"selection must be one of {list(SELECTIONS)}")
+    stored = await _stored_rows_or_404(db, result_id, current_user.username)
+    try:
+        explanations = await run_blocking(
+            get_explanations, explanations_file_path(stored.id), stored.result_path, stored.model_name,
+            stored.result_columns or [], selection, n, k, seed,
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="The rows of this result are no longer stored")
+    except ExplanationUnavailableError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {**result_index_entry(stored), **explanations}
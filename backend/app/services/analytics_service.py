@@ -0,0 +1,228 @@
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.metrics import timed
+from app.services.model_service import PREDICTION_COLUMN
+from app.services.result_store import read_result_page
+from app.services.worker_pool import run_blocking
+from app.utils.cache import TTLCache
+
+# ==========================
+# Analytics Configuration
+# ==========================
+# Aggregates are cached per (result, dimension); stored rows never change,
+# so the TTL only bounds how long unused entries hold memory
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "900"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "512"))
+# Segments returned per dimension, largest first
+ANALYTICS_MAX_GROUPS = int(os.getenv("ANALYTICS_MAX_GROUPS", "50"))
+# Numeric dimensions with more distinct values than this are split into quantile bins
+ANALYTICS_NUMERIC_BINS = int(os.getenv("ANALYTICS_NUMERIC_BINS", "10"))
+
+PROBABILITY_COLUMN = "churn_probability"
+ID_COLUMNS = ("User_ID", "ID")
+CHURN_LABELS = ("1", "True", "true", "Yes", "yes")
+DECILES = 10
+
+analytics_cache = TTLCache(maxsize=ANALYTICS_CACHE_MAX_ENTRIES, ttl=ANALYTICS_CACHE_TTL_SECONDS)
+
+
+def _churn_flags(labels: pd.Series) -> np.ndarray:
+    """
+    1.0 where the predicted label means churn, else 0.0.
+    """
+    if pd.api.types.is_bool_dtype(labels) or pd.api.types.is_numeric_dtype(labels):
+        return (labels.to_numpy() == 1).astype(np.float64)
+    return labels.astype(str).isin(CHURN_LABELS).to_numpy(dtype=np.float64)
+
+
+def _group_key(values: pd.Series, max_groups: int) -> Tuple[pd.Series, bool]:
+    """
+    The key to group `values` by and whether it is binned. Categorical columns
+    group as they are; high-cardinality numeric ones are binned into quantiles
+    (an ordered categorical) so the segments stay readable.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values) \
+            and values.nunique() > max_groups:
+        return pd.qcut(values, ANALYTICS_NUMERIC_BINS, duplicates="drop"), True
+    return values, False
+
+
+def _round(values: pd.Series, digits: int = 4) -> list:
+    return [None if pd.isna(v) else round(float(v), digits) for v in values]
+
+
+def overall_stats(flags: np.ndarray, probability: Optional[pd.Series]) -> dict:
+    return {
+        "customers": int(len(flags)),
+        "churned": int(flags.sum()),
+        "churn_rate": round(float(flags.mean()), 4) if len(flags) else None,
+        "mean_probability": round(float(probability.mean()), 4) if probability is not None and len(flags) else None,
+    }
+
+
+def segment_stats(frame: pd.DataFrame, dimension: str, flags: np.ndarray,
+                  max_groups: int = ANALYTICS_MAX_GROUPS) -> dict:
+    """
+    Churn rate and mean churn probability per value of `dimension`.
+    """
+    columns = {"churned": flags}
+    if PROBABILITY_COLUMN in frame.columns:
+        columns["probability"] = frame[PROBABILITY_COLUMN].to_numpy(dtype=np.float64)
+    key, binned = _group_key(frame[dimension], max_groups)
+    grouped = pd.DataFrame(columns, index=frame.index).groupby(key, observed=True, dropna=False, sort=binned)
+    stats = grouped["churned"].agg(["size", "sum", "mean"])
+    if "probability" in columns:
+        stats["mean_probability"] = grouped["probability"].mean()
+    if not binned:
+        stats = stats.sort_values("size", ascending=False)  # Bins stay in value order
+    shown = stats.head(max_groups)
+
+    return {
+        "dimension": dimension,
+        "groups_total": int(len(stats)),
+        "segments": [
+            {
+                "value": None if pd.isna(value) else (value.item() if hasattr(value, "item") else str(value)),
+                "customers": int(size),
+                "churned": int(churned),
+                "churn_rate": round(float(rate), 4),
+                "mean_probability": mean_probability,
+            }
+            for value, size, churned, rate, mean_probability in zip(
+                shown.index, shown["size"], shown["sum"], shown["mean"],
+                _round(shown["mean_probability"]) if "mean_probability" in shown else [None] * len(shown),
+            )
+        ],
+    }
+
+
+def decile_stats(probability: pd.Series, flags: np.ndarray) -> List[dict]:
+    """
+    Customers ranked by churn probability and cut into ten equal-sized groups;
+    decile 1 is the riskiest tenth. Includes each decile's share of all
+    predicted churners (cumulative gain) and its lift over the average.
+    """
+    n = len(probability)
+    if n == 0:
+        return []
+    order = np.argsort(-probability.to_numpy(dtype=np.float64), kind="stable")
+    decile = np.empty(n, dtype=np.int64)
+    decile[order] = np.arange(n) * DECILES // n + 1
+
+    grouped = pd.DataFrame({"decile": decile, "probability": probability.to_numpy(), "churned": flags}).groupby("decile")
+    stats = grouped.agg(
+        customers=("probability", "size"),
+        min_probability=("probability", "min"),
+        max_probability=("probability", "max"),
+        mean_probability=("probability", "mean"),
+        churned=("churned", "sum"),
+    )
+    total_churned = flags.sum()
+    overall_rate = total_churned / n
+    stats["churn_rate"] = stats["churned"] / stats["customers"]
+    stats["cumulative_gain"] = stats["churned"].cumsum() / total_churned if total_churned else np.nan
+    stats["lift"] = stats["churn_rate"] / overall_rate if overall_rate else np.nan
+
+    return [
+        {
+            "decile": int(d),
+            "customers": int(row.customers),
+            "churned": int(row.churned),
+            "churn_rate": round(float(row.churn_rate), 4),
+            "min_probability": round(float(row.min_probability), 4),
+            "max_probability": round(float(row.max_probability), 4),
+            "mean_probability": round(float(row.mean_probability), 4),
+            "cumulative_gain": None if pd.isna(row.cumulative_gain) else round(float(row.cumulative_gain), 4),
+            "lift": None if pd.isna(row.lift) else round(float(row.lift), 4),
+        }
+        for d, row in stats.iterrows()
+    ]
+
+
+def top_at_risk(frame: pd.DataFrame, n: int, columns: Sequence[str] = ()) -> List[dict]:
+    """
+    The `n` customers with the highest churn probability.
+    """
+    keep = [c for c in ID_COLUMNS if c in frame.columns] + [c for c in columns if c not in ID_COLUMNS]
+    keep += [PREDICTION_COLUMN, PROBABILITY_COLUMN]
+    top = frame.nlargest(n, PROBABILITY_COLUMN)[list(dict.fromkeys(keep))]
+    records = top.astype(object).where(top.notna(), None).to_dict("records")
+    for record in records:
+        record[PROBABILITY_COLUMN] = round(float(record[PROBABILITY_COLUMN]), 4)
+    return records
+
+
+def compute_analytics(path: str, available_columns: Sequence[str], dimensions: Sequence[str] = (),
+                      overall: bool = True, deciles: bool = False, top_n: int = 0,
+                      top_columns: Sequence[str] = ()) -> dict:
+    """
+    Compute the requested aggregates from a stored result file, reading only
+    the columns they need. Returns a dict with any of "overall", "segments"
+    (per dimension), "deciles" and "top_at_risk".
+    """
+    has_probability = PROBABILITY_COLUMN in available_columns
+    needed = [PREDICTION_COLUMN] + list(dimensions)
+    if has_probability:
+        needed.append(PROBABILITY_COLUMN)
+    if top_n and has_probability:
+        needed += [c for c in ID_COLUMNS if c in available_columns] + list(top_columns)
+
+    with timed("analytics"):
+        frame = read_result_page(path, columns=list(dict.fromkeys(needed)))
+        flags = _churn_flags(frame[PREDICTION_COLUMN])
+        probability = frame[PROBABILITY_COLUMN] if has_probability else None
+
+        computed: Dict[str, object] = {}
+        if overall:
+            computed["overall"] = overall_stats(flags, probability)
+        if dimensions:
+            computed["segments"] = {d: segment_stats(frame, d, flags) for d in dimensions}
+        if deciles:
+            computed["deciles"] = decile_stats(probability, flags) if has_probability else None
+        if top_n:
+            computed["top_at_risk"] = top_at_risk(frame, top_n, top_columns) if has_probability else None
+    return computed
+
+
+async def result_analytics(result_id: str, path: str, available_columns: Sequence[str],
+                           dimensions: Sequence[str] = (), deciles: bool = True, top_n: int = 0,
+                           top_columns: Sequence[str] = ()) -> dict:
+    """
+    Aggregates for a stored result, served from `analytics_cache` where
+    possible. Only the missing pieces are computed, in one pass on the
+    worker pool; the cache lives in this process, so it also works with
+    process workers.
+    """
+    top_key = (result_id, "top", tuple(top_columns))
+    cached = {"overall": analytics_cache.get((result_id, "overall"))}
+    segments = {d: analytics_cache.get((result_id, "segments", d)) for d in dimensions}
+    if deciles:
+        cached["deciles"] = analytics_cache.get((result_id, "deciles"))
+    if top_n:
+        # Entries hold the largest N computed so far; smaller requests slice it
+        entry = analytics_cache.get(top_key)
+        cached["top_at_risk"] = entry[1][:top_n] if entry is not None and entry[0] >= top_n else None
+
+    missing_dimensions = [d for d, value in segments.items() if value is None]
+    if missing_dimensions or any(value is None for value in cached.values()):
+        computed = await run_blocking(
+            compute_analytics, path, list(available_columns), missing_dimensions,
+            cached["overall"] is None, deciles and cached.get("deciles") is None,
+            top_n if top_n and cached.get("top_at_risk") is None else 0, list(top_columns),
+        )
+        for d, value in computed.get("segments", {}).items():
+            analytics_cache.set((result_id, "segments", d), value)
+            segments[d] = value
+        for name in ("overall", "deciles", "top_at_risk"):
+            if name in computed:
+                cached[name] = computed[name]
+                if name == "top_at_risk":
+                    analytics_cache.set(top_key, (top_n, computed[name]))
+                else:
+                    analytics_cache.set((result_id, name), computed[name])
+
+    return {**cached, "segments": segments}
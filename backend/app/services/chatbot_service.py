@@ -1,21 +1,237 @@
 import os
-import google.generativeai as genai
+import abc
+import time
+import logging
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator, Optional
+
 from dotenv import load_dotenv
 
+from app.services.worker_pool import BoundedWorkerPool, run_blocking
+from app.utils.cache import TTLCache
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Chatbot Configuration
+# ==========================
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# "gemini" calls Google's API; "stub" answers locally for offline testing
+CHATBOT_PROVIDER = os.getenv("CHATBOT_PROVIDER", "gemini")
+CHATBOT_MODEL = os.getenv("CHATBOT_MODEL", "gemini-1.5-flash")
+CHATBOT_TIMEOUT_SECONDS = float(os.getenv("CHATBOT_TIMEOUT_SECONDS", "30"))
 
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not found in environment variables")
+# Chat calls are network-bound and get their own small pool, so a slow LLM
+# can never occupy the workers that serve predictions
+CHATBOT_MAX_CONCURRENCY = int(os.getenv("CHATBOT_MAX_CONCURRENCY", "8"))
+CHATBOT_QUEUE_SIZE = int(os.getenv("CHATBOT_QUEUE_SIZE", "32"))
 
-genai.configure(api_key=GOOGLE_API_KEY)
+CHATBOT_CACHE_TTL_SECONDS = float(os.getenv("CHATBOT_CACHE_TTL_SECONDS", "3600"))
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", "1000"))
 
-async def get_gemini_response(prompt: str) -> str:
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
+# Simulated per-token latency of the stub provider
+CHATBOT_STUB_TOKEN_DELAY_SECONDS = float(os.getenv("CHATBOT_STUB_TOKEN_DELAY_SECONDS", "0.01"))
+
+chat_pool = BoundedWorkerPool(kind="thread", size=CHATBOT_MAX_CONCURRENCY, queue_size=CHATBOT_QUEUE_SIZE)
+response_cache = TTLCache(maxsize=CHATBOT_CACHE_MAX_ENTRIES, ttl=CHATBOT_CACHE_TTL_SECONDS)
+
+
+class ChatbotUnavailableError(RuntimeError):
+    pass
+
+
+class ChatBackend(abc.ABC):
+    """
+    A chat provider. Both methods block and are run on `chat_pool`.
+    """
+    name = "base"
+    model = ""
+
+    def check_available(self) -> None:
+        """
+        Cheap pre-flight check; raises ChatbotUnavailableError if calls cannot succeed.
+        """
+
+    def warm(self) -> None:
+        """
+        Load the client library ahead of the first call (used by the startup prewarm).
+        """
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.stream(prompt))
+
+    @abc.abstractmethod
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield the reply in chunks as the provider produces them.
+        """
+
+
+class GeminiBackend(ChatBackend):
+    """
+    Google Gemini. The client is configured and the model built once, on first use.
+    """
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], model: str = CHATBOT_MODEL, timeout: float = CHATBOT_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def check_available(self) -> None:
+        if not self.api_key:
+            raise ChatbotUnavailableError("GOOGLE_API_KEY not found in environment variables")
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self.check_available()
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._client = genai.GenerativeModel(self.model)
+        return self._client
+
+    def warm(self) -> None:
+        self._get_client()
+
+    def generate(self, prompt: str) -> str:
+        response = self._get_client().generate_content(prompt, request_options={"timeout": self.timeout})
         return response.text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        response = self._get_client().generate_content(
+            prompt, stream=True, request_options={"timeout": self.timeout}
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend(ChatBackend):
+    """
+    Offline provider with a canned, deterministic answer and simulated latency.
+    """
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, token_delay: float = CHATBOT_STUB_TOKEN_DELAY_SECONDS):
+        self.token_delay = token_delay
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        answer = (
+            f"This is the offline stub chatbot. You asked: \"{prompt.strip()}\". "
+            "Customers with short tenure and high balances are usually the most likely to churn."
+        )
+        for token in answer.split(" "):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield token + " "
+
+
+def create_backend(provider: str = CHATBOT_PROVIDER) -> ChatBackend:
+    if provider == "gemini":
+        return GeminiBackend(GOOGLE_API_KEY)
+    if provider == "stub":
+        return StubBackend()
+    raise ValueError(f"Unsupported chatbot provider: {provider}. Use 'gemini' or 'stub'.")
+
+
+backend = create_backend()
+
+if backend.name == "gemini" and not GOOGLE_API_KEY:
+    logger.warning("GOOGLE_API_KEY is not set; /chat will return 503 (set CHATBOT_PROVIDER=stub to test offline)")
+
+
+def _cache_key(prompt: str) -> tuple:
+    return (backend.name, backend.model, prompt.strip())
+
+
+async def get_chat_response(prompt: str) -> str:
+    """
+    Answer `prompt` on the chat pool, serving repeated prompts from the cache.
+    """
+    key = _cache_key(prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        text = await run_blocking(backend.generate, prompt, timeout=CHATBOT_TIMEOUT_SECONDS, worker_pool=chat_pool)
     except Exception as e:
-        print(f"Error getting Gemini response: {e}")
+        logger.error("Error getting chatbot response: %s", e)
         raise
+    response_cache.set(key, text)
+    return text
+
+
+_STREAM_DONE = object()
+
+
+async def stream_chat_response(prompt: str) -> AsyncIterator[str]:
+    """
+    Start answering `prompt` and return an async iterator of text chunks.
+
+    The provider call is submitted before this returns, so a saturated pool
+    raises PoolSaturatedError here rather than mid-response. The whole answer
+    must arrive within CHATBOT_TIMEOUT_SECONDS.
+    """
+    key = _cache_key(prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        async def replay() -> AsyncIterator[str]:
+            yield cached
+        return replay()
+
+    backend.check_available()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce() -> None:
+        try:
+            for chunk in backend.stream(prompt):
+                if cancelled.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
+
+    chat_pool.submit(produce)
+
+    async def consume() -> AsyncIterator[str]:
+        deadline = loop.time() + CHATBOT_TIMEOUT_SECONDS
+        parts = []
+        try:
+            while True:
+                item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    logger.error("Error streaming chatbot response: %s", item)
+                    raise item
+                parts.append(item)
+                yield item
+        finally:
+            # Stops the provider loop if the client went away or we timed out
+            cancelled.set()
+        response_cache.set(key, "".join(parts))
+
+    return consume()
+
+
+def chat_stats() -> dict:
+    return {
+        "provider": backend.name,
+        "model": backend.model,
+        "in_flight": chat_pool.in_flight,
+        "max_concurrency": CHATBOT_MAX_CONCURRENCY,
+        "cache": response_cache.stats(),
+    }
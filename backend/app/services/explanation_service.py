@@ -0,0 +1,176 @@
+import os
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.metrics import timed
+from app.services.model_registry import ModelHandle, get_model
+from app.services.result_store import read_explanations, read_result_page, write_explanations
+from app.services.schema import NUMERIC_DTYPE, model_input
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Explanation Configuration
+# ==========================
+# SHAP values cost far more than scoring, so they are computed on demand for
+# a bounded set of rows (the riskiest customers or a random sample) and
+# cached in a file next to the stored result.
+EXPLAIN_TOP_K = int(os.getenv("EXPLAIN_TOP_K", "3"))
+EXPLAIN_MAX_ROWS = int(os.getenv("EXPLAIN_MAX_ROWS", "1000"))
+# Rows per get_feature_importance call; bounds the memory of one call
+EXPLAIN_CHUNK_ROWS = int(os.getenv("EXPLAIN_CHUNK_ROWS", "256"))
+# CatBoost threads per chunk (-1 uses every core)
+EXPLAIN_THREAD_COUNT = int(os.getenv("EXPLAIN_THREAD_COUNT", "-1"))
+
+PROBABILITY_COLUMN = "churn_probability"
+ID_COLUMNS = ("User_ID", "ID")
+SELECTIONS = ("top", "sample")
+
+
+class ExplanationUnavailableError(ValueError):
+    pass
+
+
+def select_rows(probability: pd.Series, selection: str, n: int, seed: int) -> np.ndarray:
+    """
+    Row positions to explain: the `n` highest churn probabilities (riskiest
+    first) or a seeded random sample. Both are prefixes of a fixed order, so
+    a cached larger selection also answers a smaller one.
+    """
+    if selection == "top":
+        return probability.nlargest(n).index.to_numpy()
+    return np.random.default_rng(seed).permutation(len(probability))[:n]
+
+
+def _model_frame(frame: pd.DataFrame, handle: ModelHandle) -> pd.DataFrame:
+    """
+    Features in the model's order and dtypes, as they were when scored.
+    """
+    return model_input(frame, handle.schema).astype({f: NUMERIC_DTYPE for f in handle.schema.numeric})
+
+
+def shap_values(model, features: pd.DataFrame, chunk_rows: int = EXPLAIN_CHUNK_ROWS,
+                thread_count: int = EXPLAIN_THREAD_COUNT) -> np.ndarray:
+    """
+    SHAP values of a binary CatBoost model, shape (rows, features + 1); the
+    last column is the expected value. Rows are processed in chunks, each
+    split across `thread_count` cores by CatBoost.
+    """
+    from catboost import Pool
+
+    cat_features = list(model.get_cat_feature_indices())
+    chunks = []
+    for start in range(0, len(features), chunk_rows):
+        pool = Pool(features.iloc[start:start + chunk_rows], cat_features=cat_features)
+        values = np.asarray(model.get_feature_importance(data=pool, type="ShapValues", thread_count=thread_count))
+        if values.ndim != 2:
+            raise ExplanationUnavailableError("Explanations are only available for binary models")
+        chunks.append(values)
+    return np.concatenate(chunks) if chunks else np.empty((0, features.shape[1] + 1))
+
+
+def _json_value(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def top_contributions(values: np.ndarray, features: pd.DataFrame, k: int) -> List[List[dict]]:
+    """
+    The `k` largest contributions by magnitude for each row, in log-odds.
+    Positive contributions push towards churn.
+    """
+    contributions = values[:, :-1]
+    k = min(k, contributions.shape[1])
+    top = np.argsort(-np.abs(contributions), axis=1, kind="stable")[:, :k]
+    names = features.columns
+    raw = features.astype(object).where(features.notna(), None).to_numpy()
+    return [
+        [
+            {
+                "feature": names[j],
+                "value": _json_value(raw[i, j]),
+                "contribution": round(float(contributions[i, j]), 4),
+            }
+            for j in top[i]
+        ]
+        for i in range(len(top))
+    ]
+
+
+def explain_rows(path: str, model_name: str, available_columns: Sequence[str],
+                 selection: str = "top", n: int = 100, k: int = EXPLAIN_TOP_K, seed: int = 0) -> dict:
+    """
+    Compute SHAP explanations for `n` rows of a stored result.
+    """
+    handle = get_model(model_name)
+    if not hasattr(handle.model, "get_feature_importance") or handle.schema is None:
+        raise ExplanationUnavailableError(f"Explanations are not supported for model {model_name}")
+    if PROBABILITY_COLUMN not in available_columns:
+        raise ExplanationUnavailableError("This result has no churn probabilities to select rows by")
+    missing = [f for f in handle.schema.features if f not in available_columns]
+    if missing:
+        raise ExplanationUnavailableError(f"The stored rows lack model features: {missing}")
+
+    ids = [c for c in ID_COLUMNS if c in available_columns]
+    columns = list(dict.fromkeys(ids + [PROBABILITY_COLUMN] + list(handle.schema.features)))
+    with timed("explanation"):
+        frame = read_result_page(path, columns=columns)
+        rows = select_rows(frame[PROBABILITY_COLUMN], selection, n, seed)
+        chosen = frame.iloc[rows]
+        features = _model_frame(chosen, handle)
+        values = shap_values(handle.model, features)
+        reasons = top_contributions(values, chosen[list(handle.schema.features)], k)
+
+    explained = []
+    for position, (row, record) in enumerate(zip(rows, chosen[ids + [PROBABILITY_COLUMN]].to_dict("records"))):
+        explained.append({
+            "row": int(row),
+            **{c: _json_value(v) for c, v in record.items() if c != PROBABILITY_COLUMN},
+            PROBABILITY_COLUMN: round(float(record[PROBABILITY_COLUMN]), 4),
+            "base_value": round(float(values[position, -1]), 4),
+            "reasons": reasons[position],
+        })
+    return {"model_sha256": handle.sha256, "n": n, "k": k, "rows": explained}
+
+
+def _covers(entry: Optional[dict], model_sha256: str, selection: str, seed: int) -> bool:
+    # "top" is deterministic; only a random sample depends on the seed
+    return entry is not None and entry["model_sha256"] == model_sha256 \
+        and (selection == "top" or entry.get("seed") == seed)
+
+
+def get_explanations(cache_path: str, path: str, model_name: str, available_columns: Sequence[str],
+                     selection: str = "top", n: int = 100, k: int = EXPLAIN_TOP_K, seed: int = 0) -> dict:
+    """
+    Explanations for a stored result, from its cache file when that covers
+    at least `n` rows and `k` reasons computed with the current model file;
+    otherwise computed and written back. `cached` in the returned dict tells
+    which happened.
+    """
+    cache = read_explanations(cache_path) or {}
+    entry = cache.get(selection)
+    model_sha256 = get_model(model_name).sha256
+    cached = _covers(entry, model_sha256, selection, seed) and entry["n"] >= n and entry["k"] >= k
+
+    if not cached:
+        compute_n, compute_k = n, k
+        if _covers(entry, model_sha256, selection, seed):
+            # Compute the union so alternating requests don't keep recomputing
+            compute_n, compute_k = max(n, entry["n"]), max(k, entry["k"])
+        entry = {**explain_rows(path, model_name, available_columns, selection, compute_n, compute_k, seed), "seed": seed}
+        cache[selection] = entry
+        try:
+            write_explanations(cache_path, cache)
+        except OSError as e:
+            logger.warning("Could not cache explanations at %s: %s", cache_path, e)
+
+    return {
+        "selection": selection,
+        "n": n,
+        "k": k,
+        "model_sha256": entry["model_sha256"],
+        "cached": cached,
+        "rows": [{**row, "reasons": row["reasons"][:k]} for row in entry["rows"][:n]],
+    }
@@ -0,0 +1,267 @@
+import os
+import json
+import logging
+import uuid
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job import PredictionJob
+from app.services.model_service import predict_from_csv_chunked
+from app.services.result_store import persist_result_csv, record_result
+from app.services.schema import SchemaValidationError
+from app.services.worker_pool import BoundedWorkerPool, WORKER_POOL_KIND
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+os.makedirs(JOBS_DIR, exist_ok=True)
+
+# Long-running jobs get their own pool so they cannot starve interactive /csv requests
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+
+# A running job whose heartbeat (refreshed after every chunk) is older than
+# this is presumed dead and requeued at startup; keep it well above the time
+# one CSV_CHUNK_ROWS chunk takes to score
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+job_pool = BoundedWorkerPool(kind=WORKER_POOL_KIND, size=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE)
+
+
+class JobLeaseLostError(RuntimeError):
+    """
+    The job was requeued (its lease expired) and another process now runs it.
+    """
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def new_job_paths() -> tuple:
+    """
+    Allocate a job id and its input/output file paths.
+    """
+    job_id = uuid.uuid4().hex
+    return (
+        job_id,
+        os.path.join(JOBS_DIR, f"{job_id}.input.csv"),
+        os.path.join(JOBS_DIR, f"{job_id}.predicted.csv"),
+    )
+
+def create_job(db: Session, job_id: str, username: str, model_name: str, file_name: str,
+               input_path: str, output_path: str) -> PredictionJob:
+    job = PredictionJob(
+        id=job_id,
+        username=username,
+        model_name=model_name,
+        file_name=file_name,
+        input_path=input_path,
+        output_path=output_path,
+        status="queued",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def delete_job(db: Session, job: PredictionJob) -> None:
+    db.delete(job)
+    db.commit()
+
+def enqueue_job(job_id: str) -> None:
+    """
+    Hand a queued job to the job pool. Raises PoolSaturatedError when full.
+    """
+    job_pool.submit(run_prediction_job, job_id)
+
+def _estimate_rows(csv_file: str) -> int:
+    """
+    Count data rows by scanning for newlines, which is far cheaper than parsing.
+    Used only for progress/ETA, so quoted newlines inside fields are ignored.
+    """
+    lines = 0
+    last_block = b""
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            lines += block.count(b"\n")
+            last_block = block
+    if last_block and not last_block.endswith(b"\n"):
+        lines += 1
+    return max(lines - 1, 0)  # Minus the header row
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def attempt_output_path(output_path: str) -> str:
+    """
+    Where one run of a job writes its output. It is renamed to `output_path`
+    only if the run still holds the lease when it finishes, so a worker that
+    lost its lease can never overwrite the output of the one that took over.
+    """
+    return f"{output_path}.{uuid.uuid4().hex}.part"
+
+def run_prediction_job(job_id: str) -> None:
+    """
+    Score a job's input file in chunks, recording progress in the database.
+    The input file is deleted once the job has completed or failed.
+    """
+    worker_id = _worker_id()
+    db = SessionLocal()
+    try:
+        # Claim the job atomically so it is never run twice
+        now = datetime.now()
+        claimed = (
+            db.query(PredictionJob)
+            .filter(PredictionJob.id == job_id, PredictionJob.status == "queued")
+            .update({"status": "running", "started_at": now, "rows_scored": 0,
+                     "worker_id": worker_id, "heartbeat_at": now})
+        )
+        db.commit()
+        if not claimed:
+            return
+
+        def heartbeat(**values) -> None:
+            # Only while this process still holds the lease
+            renewed = (
+                db.query(PredictionJob)
+                .filter(PredictionJob.id == job_id, PredictionJob.status == "running",
+                        PredictionJob.worker_id == worker_id)
+                .update({**values, "heartbeat_at": datetime.now()})
+            )
+            db.commit()
+            if not renewed:
+                raise JobLeaseLostError(f"Prediction job {job_id} was taken over by another worker")
+
+        job = attempt_path = None
+        try:
+            job = db.get(PredictionJob, job_id)
+            attempt_path = attempt_output_path(job.output_path)
+            heartbeat(rows_total=_estimate_rows(job.input_path))
+            summary = predict_from_csv_chunked(
+                job.input_path, job.model_name, attempt_path,
+                progress_callback=lambda rows_scored: heartbeat(rows_scored=rows_scored),
+                source_name=job.file_name,
+            )
+        except JobLeaseLostError as e:
+            logger.warning("%s; abandoning it", e, extra={"job_id": job_id})
+            if attempt_path is not None:
+                _remove_file(attempt_path)
+            return
+        except Exception as e:
+            db.rollback()
+            logger.error("Prediction job %s failed: %s", job_id, e, extra={"job_id": job_id})
+            if attempt_path is not None:
+                _remove_file(attempt_path)
+            error = json.dumps(e.report) if isinstance(e, SchemaValidationError) else str(e)
+            finished = _finish(db, job_id, worker_id, {"status": "failed", "error": error})
+        else:
+            finished = _finish(db, job_id, worker_id, {
+                "status": "completed",
+                "rows_total": summary["total_records"],
+                "rows_scored": summary["total_records"],
+                "class_distribution": {str(k): v for k, v in summary["class_distribution"].items()},
+            })
+            if finished:
+                os.replace(attempt_path, job.output_path)
+                record_result(db, job.id, job.username, job.file_name, {**summary, "output_path": job.output_path})
+                persist_result_csv(job.id, job.output_path)
+            else:
+                logger.warning("Prediction job %s was taken over by another worker; discarding its output",
+                               job_id, extra={"job_id": job_id})
+                _remove_file(attempt_path)
+        if finished and job is not None:
+            _remove_file(job.input_path)
+    finally:
+        db.close()
+
+def _finish(db: Session, job_id: str, worker_id: str, values: dict) -> bool:
+    """
+    Record the final state, unless the lease was lost meanwhile.
+    """
+    finished = (
+        db.query(PredictionJob)
+        .filter(PredictionJob.id == job_id, PredictionJob.status == "running", PredictionJob.worker_id == worker_id)
+        .update({**values, "finished_at": datetime.now()})
+    )
+    db.commit()
+    return bool(finished)
+
+def resume_pending_jobs(now: Optional[datetime] = None) -> int:
+    """
+    Re-queue queued jobs and running jobs whose lease has expired (their
+    worker stopped). Jobs other live workers are running are left alone.
+    Returns the number of jobs resubmitted.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    db = SessionLocal()
+    try:
+        stale = (
+            db.query(PredictionJob.id)
+            .filter(PredictionJob.status == "running")
+            .filter((PredictionJob.heartbeat_at < cutoff) | PredictionJob.heartbeat_at.is_(None))
+            .all()
+        )
+        for (job_id,) in stale:
+            # Conditional on the heartbeat, so a job that just reported progress is kept
+            (
+                db.query(PredictionJob)
+                .filter(PredictionJob.id == job_id, PredictionJob.status == "running")
+                .filter((PredictionJob.heartbeat_at < cutoff) | PredictionJob.heartbeat_at.is_(None))
+                .update({"status": "queued", "rows_scored": 0, "worker_id": None}, synchronize_session=False)
+            )
+        db.commit()
+        job_ids = [
+            job_id for (job_id,) in
+            db.query(PredictionJob.id).filter(PredictionJob.status == "queued").order_by(PredictionJob.created_at).all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        try:
+            enqueue_job(job_id)
+        except Exception as e:
+            logger.warning("Could not resume prediction job %s: %s", job_id, e)
+    return len(job_ids)
+
+def job_status(job: PredictionJob) -> dict:
+    """
+    Public view of a job, including progress and a naive ETA.
+    """
+    eta_seconds: Optional[float] = None
+    progress = None
+    if job.rows_total:
+        progress = round(job.rows_scored / job.rows_total, 4)
+        if job.status == "running" and job.started_at and job.rows_scored:
+            elapsed = (datetime.now() - job.started_at).total_seconds()
+            remaining = max(job.rows_total - job.rows_scored, 0)
+            eta_seconds = round(elapsed / job.rows_scored * remaining, 1)
+
+    status = {
+        "job_id": job.id,
+        "status": job.status,
+        "model_used": job.model_name,
+        "file_name": job.file_name,
+        "rows_total": job.rows_total,
+        "rows_scored": job.rows_scored,
+        "progress": progress,
+        "eta_seconds": eta_seconds,
+        "class_distribution": job.class_distribution,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == "completed":
+        status["results_url"] = f"/jobs/{job.id}/results"
+        status["download_url"] = f"/jobs/{job.id}/download"
+        status["report_url"] = f"/report/pdf/{job.id}"
+    return status
@@ -0,0 +1,69 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, REGISTRY,
+)
+
+# ==========================
+# Prediction Pipeline Metrics
+# ==========================
+# With WORKER_POOL_KIND=process, set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory so samples recorded in worker processes are included in /metrics.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Pipeline stages timed by `timed()`
+STAGES = (
+    "upload_read", "csv_parse", "feature_selection", "inference", "serialization", "report_render", "analytics",
+    "explanation",
+)
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "churn_stage_duration_seconds", "Time spent in each prediction pipeline stage", ["stage"], buckets=STAGE_BUCKETS,
+)
+PREDICTIONS_TOTAL = Counter(
+    "churn_prediction_requests_total", "Prediction requests by model choice and mode", ["model_choice", "mode"],
+)
+ROWS_SCORED_TOTAL = Counter("churn_rows_scored_total", "Rows scored by model file", ["model"])
+ERRORS_TOTAL = Counter("churn_errors_total", "Errors raised in a pipeline stage", ["stage", "error"])
+AUTH_CACHE_LOOKUPS_TOTAL = Counter(
+    "churn_auth_cache_lookups_total", "Principal cache lookups by authenticated requests, by result", ["result"],
+)
+MICROBATCH_ROWS = Histogram(
+    "churn_microbatch_rows", "Rows per coalesced /predict/rows batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+for _stage in STAGES:
+    STAGE_SECONDS.labels(stage=_stage)  # Export every stage from the start, even before it runs
+for _result in ("hit", "miss"):
+    AUTH_CACHE_LOOKUPS_TOTAL.labels(result=_result)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Record the duration of the enclosed block under `stage`, and count any
+    exception it raises as an error of that stage.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS_TOTAL.labels(stage=stage, error=type(e).__name__).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
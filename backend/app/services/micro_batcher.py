@@ -0,0 +1,224 @@
+import os
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.metrics import MICROBATCH_ROWS, ROWS_SCORED_TOTAL, timed
+from app.services.model_registry import ModelHandle, get_model, model_input_errors
+from app.services.model_service import (
+    PREDICTION_COLUMN, _guess_model_features, _run_inference, get_decision_threshold,
+)
+from app.services.schema import CATEGORICAL_DTYPE, NUMERIC_DTYPE, SchemaValidationError, validate_columns
+from app.services.worker_pool import BoundedWorkerPool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Micro-batching Configuration
+# ==========================
+# A batch is scored as soon as it holds MICROBATCH_MAX_ROWS rows, or
+# MICROBATCH_MAX_WAIT_MS after its first request arrived, whichever is first
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", "256"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+# Rows allowed to wait for a batch before new requests are rejected with 429
+MICROBATCH_MAX_PENDING_ROWS = int(os.getenv("MICROBATCH_MAX_PENDING_ROWS", "10000"))
+MICROBATCH_TIMEOUT_SECONDS = float(os.getenv("MICROBATCH_TIMEOUT_SECONDS", "5"))
+
+# Real-time scoring has its own threads so CSV uploads cannot delay it
+MICROBATCH_WORKERS = int(os.getenv("MICROBATCH_WORKERS", "2"))
+# One batcher per (model, threshold); the least recently used are dropped
+# beyond this, so arbitrary client thresholds cannot grow memory
+MICROBATCH_MAX_BATCHERS = int(os.getenv("MICROBATCH_MAX_BATCHERS", "32"))
+
+batch_pool = BoundedWorkerPool(kind="thread", size=MICROBATCH_WORKERS, queue_size=MICROBATCH_WORKERS * 4)
+
+
+def _frame_for_model(records: Sequence[Dict[str, Any]], handle: ModelHandle) -> pd.DataFrame:
+    """
+    Build the model's input frame from JSON records, typed by its schema.
+
+    Columns are built directly rather than through `DataFrame.from_records`
+    and `astype`, which cost several times the model call on small batches.
+    Categorical features stay as object arrays; the models accept them as is.
+    """
+    schema = handle.schema
+    if schema is None:
+        frame = pd.DataFrame.from_records(records)
+        return frame[_guess_model_features(frame.columns)]
+    # Only keys present in every record count as available columns
+    common = set(records[0]).intersection(*records[1:])
+    validate_columns(schema, [key for key in records[0] if key in common])
+
+    columns = {}
+    for feature in schema.features:
+        values = [record[feature] for record in records]
+        dtype = schema.dtypes.get(feature)
+        if dtype == NUMERIC_DTYPE:
+            try:
+                columns[feature] = np.asarray(values, dtype=NUMERIC_DTYPE)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"{e}: Error while type casting for column '{feature}'") from e
+        elif dtype == CATEGORICAL_DTYPE:
+            columns[feature] = np.asarray(values, dtype=object)
+        else:
+            columns[feature] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def _score_rows(records: Sequence[Dict[str, Any]], model_name: str, threshold: float) -> Tuple[list, Optional[list]]:
+    handle = get_model(model_name)
+    frame = _frame_for_model(records, handle)
+    with timed("inference"):
+        try:
+            preds, churn_prob = _run_inference(handle.model, frame, threshold)
+        except model_input_errors() as e:
+            # Reported like any other bad input, so the batch falls back per request
+            raise ValueError(f"The model rejected the input: {e}") from e
+    ROWS_SCORED_TOTAL.labels(model=model_name).inc(len(frame))
+    return np.asarray(preds).ravel().tolist(), None if churn_prob is None else np.asarray(churn_prob).tolist()
+
+
+def score_batch(requests: List[List[Dict[str, Any]]], model_name: str, threshold: float) -> list:
+    """
+    Score several requests' records in one model call and split the output
+    back per request. If the combined batch cannot be typed, each request is
+    scored on its own so one bad request only fails itself.
+    Returns, per request, either (labels, probabilities) or the exception.
+    """
+    MICROBATCH_ROWS.observe(sum(len(r) for r in requests))
+    try:
+        labels, probs = _score_rows([record for request in requests for record in request], model_name, threshold)
+    except (ValueError, TypeError, SchemaValidationError):
+        if len(requests) == 1:
+            raise
+        outcomes = []
+        for request in requests:
+            try:
+                outcomes.append(_score_rows(request, model_name, threshold))
+            except (ValueError, TypeError, SchemaValidationError) as e:
+                outcomes.append(e)
+        return outcomes
+
+    outcomes, start = [], 0
+    for request in requests:
+        end = start + len(request)
+        outcomes.append((labels[start:end], None if probs is None else probs[start:end]))
+        start = end
+    return outcomes
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent row-scoring requests for one model and threshold.
+
+    Runs on the event loop: requests are queued with a future each, and the
+    queue is flushed to `batch_pool` when it reaches `max_rows` or `max_wait`
+    seconds after the first queued request. Several batches may be in flight,
+    so requests keep accumulating while the previous batch is scored.
+    """
+
+    def __init__(self, model_name: str, threshold: float, max_rows: int = MICROBATCH_MAX_ROWS,
+                 max_wait: float = MICROBATCH_MAX_WAIT_MS / 1000, max_pending_rows: int = MICROBATCH_MAX_PENDING_ROWS):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.max_pending_rows = max_pending_rows
+        self._pending: Deque[Tuple[List[Dict[str, Any]], asyncio.Future]] = deque()
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def score(self, records: List[Dict[str, Any]]) -> Tuple[list, Optional[list], int]:
+        """
+        Queue `records` and wait for their (labels, probabilities, batch rows).
+        """
+        if self._pending_rows + len(records) > self.max_pending_rows:
+            raise PoolSaturatedError(f"{self._pending_rows} rows are already waiting to be scored")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((records, future))
+        self._pending_rows += len(records)
+
+        if self._pending_rows >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            # Take whole requests up to max_rows; an oversized request goes alone
+            batch, rows = [], 0
+            while self._pending and (not batch or rows + len(self._pending[0][0]) <= self.max_rows):
+                records, future = self._pending.popleft()
+                batch.append((records, future))
+                rows += len(records)
+            self._pending_rows -= rows
+            asyncio.ensure_future(self._run(batch, rows))
+
+    async def _run(self, batch: List[Tuple[List[Dict[str, Any]], asyncio.Future]], rows: int) -> None:
+        try:
+            outcomes = await batch_pool.run(
+                score_batch, [records for records, _ in batch], self.model_name, self.threshold,
+                timeout=MICROBATCH_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            if not isinstance(e, (ValueError, TypeError)):  # Bad input is reported to the caller, not logged
+                logger.warning("Micro-batch of %d rows for %s failed: %s", rows, self.model_name, e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result((*outcome, rows))
+
+
+_batchers: "OrderedDict[Tuple[str, float], MicroBatcher]" = OrderedDict()
+
+
+def get_batcher(model_name: str, threshold: Optional[float] = None) -> MicroBatcher:
+    """
+    The batcher for a model and threshold. Dropping one from `_batchers` is
+    safe: its queued requests are still flushed by its own timer and tasks.
+    """
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+    key = (model_name, threshold)
+    batcher = _batchers.get(key)
+    if batcher is None:
+        batcher = _batchers[key] = MicroBatcher(model_name, threshold)
+        while len(_batchers) > MICROBATCH_MAX_BATCHERS:
+            _batchers.popitem(last=False)
+    else:
+        _batchers.move_to_end(key)
+    return batcher
+
+
+async def score_records(records: List[Dict[str, Any]], model_name: str, threshold: Optional[float] = None) -> dict:
+    """
+    Score a few JSON records through the model's micro-batcher.
+    """
+    batcher = get_batcher(model_name, threshold)
+    labels, probs, batch_rows = await batcher.score(records)
+    predictions = [{PREDICTION_COLUMN: label} for label in labels]
+    if probs is not None:
+        for prediction, prob in zip(predictions, probs):
+            prediction["churn_probability"] = prob
+    return {
+        "model_used": model_name,
+        "decision_threshold": batcher.threshold,
+        "batch_rows": batch_rows,
+        "predictions": predictions,
+    }
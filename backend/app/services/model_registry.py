@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import hashlib
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.schema import ModelSchema, schema_for_model
+
+# ✅ Dynamically resolve model path (overridable for deployments / local stand-in models)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(BASE_DIR, "models"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """
+    Immutable view of a loaded model. A request keeps its handle for its whole
+    lifetime, so a concurrent reload never swaps the model out from under it.
+    """
+    name: str
+    path: str
+    model: Any
+    mtime: float
+    sha256: str
+    size_bytes: int
+    load_seconds: float
+    memory_bytes: Optional[int]
+    loaded_at: datetime
+    schema: Optional[ModelSchema] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "sha256": self.sha256,
+            "size_bytes": self.size_bytes,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "loaded_at": self.loaded_at.isoformat(),
+            "features": list(self.schema.features) if self.schema else None,
+        }
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process (Linux only), used to approximate how much
+    memory a model takes once deserialized.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _load_model_file(model_path: str, model_name: str) -> Any:
+    """
+    Deserialize a model file. Supports .cbm (CatBoost) and .joblib files.
+    CatBoost and joblib are imported here rather than at module import, so
+    the API starts without paying for them.
+    """
+    from catboost import CatBoostClassifier, CatBoostError
+    import joblib
+
+    if model_name.endswith(".cbm"):
+        try:
+            model = CatBoostClassifier()
+            model.load_model(model_path)
+            logger.debug("Loaded CatBoost model from %s", model_path)
+        except CatBoostError as e:
+            if "Incorrect model file descriptor" in str(e):
+                logger.warning("CatBoost model loading failed for %s. Attempting to load with joblib as a fallback.", model_name)
+                try:
+                    model = joblib.load(model_path)
+                    logger.debug("Loaded model with joblib fallback from %s", model_path)
+                except Exception as joblib_e:
+                    raise ValueError(f"Failed to load {model_name} as either CatBoost or joblib. It may be corrupted. CatBoost error: {e}, Joblib error: {joblib_e}")
+            else:
+                raise e  # Re-raise other CatBoost errors
+    elif model_name.endswith(".joblib"):
+        model = joblib.load(model_path)
+        logger.debug("Loaded joblib model from %s", model_path)
+    else:
+        raise ValueError(f"Unsupported model type for {model_name}. Supported types are .cbm and .joblib.")
+    return model
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of deserialized models.
+
+    Each model is loaded once and handed out as an immutable `ModelHandle`.
+    Every lookup stats the file; when its mtime changes the file is re-hashed
+    and reloaded only if the content actually differs.
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
+        self._handles: Dict[str, ModelHandle] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lock_for(self, model_name: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(model_name, threading.Lock())
+
+    def get(self, model_name: str) -> ModelHandle:
+        model_path = os.path.join(self.models_dir, model_name)
+        try:
+            mtime = os.stat(model_path).st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"Model file not found at {model_path}. Please ensure the model exists."
+            )
+
+        handle = self._handles.get(model_name)
+        if handle is not None and handle.mtime == mtime:
+            return handle
+
+        # Only one thread (re)loads a given model; others wait and reuse its result.
+        with self._lock_for(model_name):
+            handle = self._handles.get(model_name)
+            if handle is not None and handle.mtime == mtime:
+                return handle
+
+            sha256 = _file_sha256(model_path)
+            if handle is not None and handle.sha256 == sha256:
+                # Touched but unchanged: keep the loaded model, remember the new mtime.
+                handle = replace(handle, mtime=mtime)
+            else:
+                handle = self._load(model_name, model_path, mtime, sha256)
+            self._handles[model_name] = handle
+            return handle
+
+    def _load(self, model_name: str, model_path: str, mtime: float, sha256: str) -> ModelHandle:
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        model = _load_model_file(model_path, model_name)
+        load_seconds = time.perf_counter() - started
+        rss_after = _current_rss_bytes()
+
+        memory_bytes = None
+        if rss_before is not None and rss_after is not None:
+            memory_bytes = max(rss_after - rss_before, 0)
+
+        logger.info("Model loaded from %s in %.3fs", model_path, load_seconds, extra={"model": model_name})
+        return ModelHandle(
+            name=model_name,
+            path=model_path,
+            model=model,
+            mtime=mtime,
+            sha256=sha256,
+            size_bytes=os.path.getsize(model_path),
+            load_seconds=load_seconds,
+            memory_bytes=memory_bytes,
+            loaded_at=datetime.now(),
+            schema=schema_for_model(model),
+        )
+
+    def warm(self, model_names: Iterable[str]) -> None:
+        """
+        Eagerly load the given models. Failures are reported, not raised, so a
+        missing model file does not prevent the API from starting.
+        """
+        for model_name in model_names:
+            try:
+                self.get(model_name)
+            except Exception as e:
+                logger.warning("Could not preload model %s: %s", model_name, e)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [handle.stats() for handle in self._handles.values()]
+
+
+registry = ModelRegistry()
+
+
+def model_input_errors() -> tuple:
+    """
+    Exceptions a model raises for values it cannot use (e.g. a number or None
+    in a categorical feature). CatBoost is imported already once a .cbm model
+    is loaded, so this does not load it early.
+    """
+    try:
+        from catboost import CatBoostError
+    except ImportError:
+        return ()
+    return (CatBoostError,)
+
+
+def get_model(model_name: str) -> ModelHandle:
+    return registry.get(model_name)
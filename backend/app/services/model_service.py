@@ -1,133 +1,456 @@
 import os
+import json
+import uuid
+import hashlib
+import logging
+import numpy as np
 import pandas as pd
-from catboost import CatBoostClassifier, CatBoostError
-import joblib
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Optional, Sequence, Tuple
 
-# ✅ Dynamically resolve model path
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-MODELS_DIR = os.path.join(BASE_DIR, "models")
+from app.services.metrics import ROWS_SCORED_TOTAL, timed
+from app.services.model_registry import MODELS_DIR, ModelHandle, get_model, registry
+from app.services.schema import (
+    SchemaValidationError, check_numeric, invalid_numeric_report, model_input, read_columns, read_for_model, read_kwargs,
+    validate_columns,
+)
 
-model = None
+logger = logging.getLogger(__name__)
+
+class ModelChoice(str, Enum):
+    general = "General"
+    life_insurance = "Life_Insurance"
+    automobile_insurance = "Automobile_Insurance"
+
+MODEL_MAPPING = {
+    ModelChoice.general: "catboost_model.cbm",
+    ModelChoice.life_insurance: "life_insurance.cbm",
+    ModelChoice.automobile_insurance: "automobile_insurance.joblib",
+}
+
+# The model whose predictions are replaced by demo labels seeded by the uploaded file name
+DEMO_OVERRIDE_MODEL = MODEL_MAPPING[ModelChoice.automobile_insurance]
 
 def load_model(model_name: str):
     """
-    Load a model from the models directory.
+    Return the cached model for `model_name`, loading it on first use.
     Supports .cbm (CatBoost) and .joblib files.
     """
-    global model
-    model_path = os.path.join(MODELS_DIR, model_name)
+    return get_model(model_name).model
+
+def warm_models() -> None:
+    """
+    Load every model in `MODEL_MAPPING` so the first requests do not pay for it.
+    """
+    registry.warm(MODEL_MAPPING.values())
+
+# Rows per chunk in streaming mode; peak memory scales with this, not the file size
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))
+
+PREDICTION_COLUMN = "Predicted_Target"
+
+# Churn cut-off applied to P(churn) for binary models. Per-model overrides use
+# CHURN_THRESHOLDS="life_insurance.cbm=0.35,catboost_model.cbm=0.6"
+DEFAULT_DECISION_THRESHOLD = float(os.getenv("CHURN_THRESHOLD", "0.5"))
+
+def _parse_thresholds(raw: str) -> dict:
+    thresholds = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            thresholds[name.strip()] = float(value)
+    return thresholds
+
+MODEL_THRESHOLDS = _parse_thresholds(os.getenv("CHURN_THRESHOLDS", ""))
+
+def get_decision_threshold(model_name: str) -> float:
+    return MODEL_THRESHOLDS.get(model_name, DEFAULT_DECISION_THRESHOLD)
+
+# Report summaries are computed while scoring. Histogram edges are fixed over
+# [0, 1] so per-chunk counts can simply be summed.
+PROBABILITY_BIN_EDGES = np.linspace(0.0, 1.0, 21)
+REPORT_SAMPLE_ROWS = 10
+
+def probability_bin_counts(churn_prob) -> np.ndarray:
+    values = np.asarray(churn_prob, dtype=float)
+    return np.histogram(values[~np.isnan(values)], bins=PROBABILITY_BIN_EDGES)[0]
+
+def probability_bins_payload(counts) -> dict:
+    return {"counts": [int(c) for c in counts], "edges": [float(e) for e in PROBABILITY_BIN_EDGES]}
+
+def sample_records(frame: pd.DataFrame, rows: int = REPORT_SAMPLE_ROWS) -> list:
+    """
+    First `rows` rows as JSON-safe records (NaN becomes null).
+    """
+    head = frame.head(rows)
+    float32_columns = head.select_dtypes("float32").columns
+    if len(float32_columns):
+        # Go through str so 0.1 stays 0.1 instead of 0.10000000149
+        head = head.astype({col: str for col in float32_columns}).astype({col: "float64" for col in float32_columns})
+    return json.loads(head.to_json(orient="records"))
+
+@dataclass
+class PredictionResult:
+    """
+    Scored rows plus the aggregates the API needs, kept in memory so the route
+    never has to re-read them from disk.
+    """
+    frame: pd.DataFrame
+    class_distribution: dict
+    prediction_column: str
+    model_used: str
+    decision_threshold: Optional[float] = None
+    result_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    probability_bins: Optional[dict] = None
 
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(
-            f"Model file not found at {model_path}. Please ensure the model exists."
-        )
+    @property
+    def total_records(self) -> int:
+        return len(self.frame)
 
-    if model_name.endswith(".cbm"):
+    def summary(self) -> dict:
+        """
+        Aggregates needed to build a report without the scored rows.
+        """
+        return {
+            "total_records": self.total_records,
+            "class_distribution": self.class_distribution,
+            "prediction_column": self.prediction_column,
+            "model_used": self.model_used,
+            "decision_threshold": self.decision_threshold,
+            "probability_bins": self.probability_bins,
+            "sample": sample_records(self.frame),
+        }
+
+def _guess_model_features(columns) -> list:
+    """
+    Fallback for models that don't store feature names.
+    """
+    potential_non_features = ['ID', 'id', 'Id', 'Target', 'target']
+    model_features = [col for col in columns if col not in potential_non_features]
+    logger.warning("Could not definitively determine model features. Guessing feature columns: %s", model_features)
+    return model_features
+
+def _demo_rng(source_name: str):
+    """
+    Seeded generator for the automobile demo override, keyed on the uploaded
+    file name so different datasets get different (but repeatable) churn rates.
+    """
+    file_hash = hashlib.md5(str(source_name).encode()).hexdigest()
+    seed = int(file_hash[:8], 16)
+    rng = np.random.default_rng(seed)
+    churn_rate = rng.uniform(0.2, 0.3)  # 20-30%
+    return rng, churn_rate, seed
+
+def _run_inference(model, data_for_prediction, threshold: float):
+    """
+    Run the model once and return (labels, churn probability).
+
+    Labels are derived from `predict_proba` with the given decision threshold
+    rather than calling `predict` as well; only models without usable
+    probabilities fall back to `predict`, with no churn probability.
+    """
+    proba = None
+    if hasattr(model, "predict_proba"):
         try:
-            model = CatBoostClassifier()
-            model.load_model(model_path)
-            print(f"[DEBUG] Loaded CatBoost model from {model_path}")
-        except CatBoostError as e:
-            if "Incorrect model file descriptor" in str(e):
-                print(f"⚠️ CatBoost model loading failed for {model_name}. Attempting to load with joblib as a fallback.")
-                try:
-                    model = joblib.load(model_path)
-                    print(f"[DEBUG] Loaded model with joblib fallback from {model_path}")
-                except Exception as joblib_e:
-                    raise ValueError(f"Failed to load {model_name} as either CatBoost or joblib. It may be corrupted. CatBoost error: {e}, Joblib error: {joblib_e}")
-            else:
-                raise e # Re-raise other CatBoost errors
-    elif model_name.endswith(".joblib"):
-        model = joblib.load(model_path)
-        print(f"[DEBUG] Loaded joblib model from {model_path}")
+            proba = np.asarray(model.predict_proba(data_for_prediction))
+            logger.debug("Probabilities shape: %s", proba.shape)
+        except Exception as e:
+            logger.warning("Could not compute probabilities: %s", e)
+
+    if proba is None or proba.ndim != 2 or proba.shape[1] < 2:
+        return np.asarray(model.predict(data_for_prediction)).ravel(), None
+
+    # Probabilities for binary classification (prob of class 1/churn)
+    churn_prob = proba[:, 1]
+    classes = np.asarray(getattr(model, "classes_", np.arange(proba.shape[1])))
+    if proba.shape[1] == 2:
+        preds = classes[(churn_prob >= threshold).astype(int)]
     else:
-        raise ValueError(f"Unsupported model type for {model_name}. Supported types are .cbm and .joblib.")
+        preds = classes[proba.argmax(axis=1)]
+    return preds, churn_prob
+
+def score_frame(data: pd.DataFrame, model_name: str, threshold: Optional[float] = None,
+                row_offset: int = 0) -> pd.DataFrame:
+    """
+    Score an already-loaded frame, adding User_ID, Predicted_Target and
+    churn_probability to it in place. Shared by the API, streaming and batch
+    paths; `row_offset` keeps User_IDs continuous across chunks of one file.
+    """
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+    handle: ModelHandle = get_model(model_name)  # Cached; reloaded only if the file changed
+
+    with timed("feature_selection"):
+        if handle.schema is not None:
+            validate_columns(handle.schema, data.columns)
+            model_features = list(handle.schema.features)
+        else:
+            model_features = _guess_model_features(data.columns)
+
+        if handle.schema is not None:
+            # Categoricals converted on a copy; `data` keeps the uploaded values
+            data_for_prediction = model_input(data, handle.schema)
+        else:
+            # Select only the features the model expects (no copy if the frame has exactly those)
+            data_for_prediction = data if list(data.columns) == model_features else data[model_features]
+    logger.debug("Data for prediction shape: %s", data_for_prediction.shape)
 
-    print(f"✅ Model loaded successfully from {model_path}")
+    # Run predictions (single inference pass)
+    with timed("inference"):
+        preds, churn_prob = _run_inference(handle.model, data_for_prediction, threshold)
+    logger.debug("Predictions shape: %s", getattr(preds, "shape", type(preds)))
+    ROWS_SCORED_TOTAL.labels(model=model_name).inc(len(data))
+
+    data.insert(0, "User_ID", [f"U{row_offset + i + 1:04d}" for i in range(len(data))])
+    data[PREDICTION_COLUMN] = np.asarray(preds).ravel()
+    if churn_prob is not None:
+        data["churn_probability"] = churn_prob
+    return data
 
-def predict_from_csv(csv_file: str, model_name: str, output_dir: str = None):
+def predict_from_csv(csv_file: str, model_name: str, threshold: Optional[float] = None,
+                     input_columns: Optional[Sequence[str]] = None, source_name: Optional[str] = None) -> PredictionResult:
     """
-    Make predictions from a CSV file using the specified model and save the result.
+    Make predictions from a CSV file using the specified model.
+    `threshold` overrides the model's configured churn decision threshold.
+    `input_columns` limits which non-feature columns are loaded and returned
+    (None keeps them all). `source_name` is the uploaded file's name, which
+    seeds the demo override (defaults to `csv_file`).
+    Use `save_prediction_result` to persist the result.
     """
-    load_model(model_name) # Load the selected model
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+    handle: ModelHandle = get_model(model_name)
 
-    if model is None:
-        raise RuntimeError("❌ Model is not loaded. Call load_model() first.")
+    # Load CSV into dataframe, typed and validated against the model's schema
+    with timed("csv_parse"):
+        if handle.schema is not None:
+            data = read_for_model(csv_file, handle.schema, input_columns)
+        else:
+            data = pd.read_csv(csv_file)
+    logger.debug("Loaded input CSV with shape: %s", data.shape)
 
-    # Load CSV into dataframe
-    data = pd.read_csv(csv_file)
-    print(f"[DEBUG] Loaded input CSV with shape: {data.shape}")
+    # Create result DataFrame by augmenting original data so the UI can show full rows
+    result_df = score_frame(data, model_name, threshold)
 
-    # Get expected features from the model
-    if hasattr(model, 'feature_names_'):  # CatBoost
-        model_features = model.feature_names_
-        print(f"[DEBUG] CatBoost model features: {model_features}")
-    elif hasattr(model, 'feature_names_in_'):  # scikit-learn
-        model_features = model.feature_names_in_
-        print(f"[DEBUG] Sklearn model features: {model_features}")
-    else:
-        # Fallback for models that don't store feature names
-        potential_non_features = ['ID', 'id', 'Id', 'Target', 'target']
-        model_features = [col for col in data.columns if col not in potential_non_features]
-        print(f"⚠️ Could not definitively determine model features. Guessing feature columns: {model_features}")
-
-    # Ensure all model features are in the dataframe
-    if not all(feature in data.columns for feature in model_features):
-        missing_features = [feature for feature in model_features if feature not in data.columns]
-        print(f"[ERROR] Missing features in CSV: {missing_features}")
-        raise ValueError(f"Missing features in CSV: {missing_features}")
-
-    # Select only the features the model expects
-    data_for_prediction = data[model_features]
-    print(f"[DEBUG] Data for prediction shape: {data_for_prediction.shape}")
-
-    # Run predictions
-    preds = model.predict(data_for_prediction)
     # For demo: override predictions for automobile_insurance.joblib only
-    if model_name == 'automobile_insurance.joblib':
-        import numpy as np
-        import hashlib
-        n = len(data_for_prediction)
-        # Use file name hash to seed randomness for different datasets
-        file_hash = hashlib.md5(str(csv_file).encode()).hexdigest()
-        seed = int(file_hash[:8], 16)
-        rng = np.random.default_rng(seed)
-        churn_rate = rng.uniform(0.2, 0.3)  # 20-30%
-        n_churn = int(n * churn_rate)
-        preds = np.array([1]*n_churn + [0]*(n-n_churn))
-        rng.shuffle(preds)
-        print(f"[DEMO] Overriding automobile predictions: churn rate {churn_rate:.2%}, churn count {n_churn} of {n}, seed {seed}")
-    print(f"[DEBUG] Predictions shape: {getattr(preds, 'shape', type(preds))}")
-    # Probabilities for binary classification (prob of class 1/churn)
+    if model_name == DEMO_OVERRIDE_MODEL:
+        result_df[PREDICTION_COLUMN] = _demo_override_labels(source_name or csv_file, len(result_df))
+
+    return _build_result(result_df, model_name, threshold)
+
+def _demo_override_labels(source_name: str, n: int) -> np.ndarray:
+    rng, churn_rate, seed = _demo_rng(source_name)
+    n_churn = int(n * churn_rate)
+    preds = np.array([1]*n_churn + [0]*(n-n_churn))
+    rng.shuffle(preds)
+    logger.info("Overriding automobile predictions: churn rate %.2f%%, churn count %d of %d, seed %d",
+                churn_rate * 100, n_churn, n, seed)
+    return preds
+
+def _build_result(result_df: pd.DataFrame, model_name: str, threshold: float) -> PredictionResult:
+    """
+    Wrap a scored frame with its class distribution and probability histogram.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Result DataFrame columns: %s", result_df.columns.tolist())
+        first_preds = result_df[PREDICTION_COLUMN].head().tolist()
+        logger.debug("First 5 predictions: %s", first_preds)
+        if len(set(first_preds)) == 1:
+            logger.debug("All first 5 predictions are the same: %s", first_preds[0])
+    if result_df[PREDICTION_COLUMN].isnull().all():
+        logger.error("All predictions are null!", extra={"model": model_name})
+
+    probability_bins = None
+    if "churn_probability" in result_df.columns:
+        probability_bins = probability_bins_payload(probability_bin_counts(result_df["churn_probability"]))
+
+    return PredictionResult(
+        frame=result_df,
+        class_distribution=result_df[PREDICTION_COLUMN].value_counts().to_dict(),
+        prediction_column=PREDICTION_COLUMN,
+        model_used=model_name,
+        decision_threshold=threshold,
+        probability_bins=probability_bins,
+    )
+
+def read_for_models(csv_file: str, model_names: Sequence[str],
+                    input_columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Parse a CSV once for several models: the header is validated against every
+    schema and dtypes are left to pandas; each model converts its own copy
+    of the features when scoring.
+    """
+    schemas = [s for s in (get_model(name).schema for name in model_names) if s is not None]
+    columns = read_columns(csv_file)
+    for schema in schemas:
+        validate_columns(schema, columns)
+
+    kwargs = {}
+    # Models without a schema guess their features from every column, so projection needs all schemas
+    if input_columns is not None and len(schemas) == len(model_names):
+        wanted = set(input_columns).union(*(schema.features for schema in schemas))
+        kwargs["usecols"] = [c for c in columns if c in wanted]
+
     try:
-        proba = model.predict_proba(data_for_prediction)
-        churn_prob = proba[:, 1]
-        print(f"[DEBUG] Probabilities shape: {proba.shape}")
-    except Exception as e:
-        churn_prob = None
-        print(f"[WARN] Could not compute probabilities: {e}")
+        data = pd.read_csv(csv_file, **kwargs)
+        for schema in schemas:
+            check_numeric(data, schema)
+        return data
+    except (ValueError, TypeError):
+        for schema in schemas:
+            report = invalid_numeric_report(csv_file, schema)
+            if report["invalid_columns"]:
+                raise SchemaValidationError(report)
+        raise
 
-    # Create result DataFrame by augmenting original data so the UI can show full rows
-    result_df = data.copy()
-    result_df.insert(0, "User_ID", [f"U{i+1:04d}" for i in range(len(result_df))])
-    result_df["Predicted_Target"] = preds
+def score_shared_frame(data: pd.DataFrame, model_name: str, threshold: Optional[float] = None,
+                       source_name: Optional[str] = None) -> PredictionResult:
+    """
+    Score `data` without modifying it, so several models can score the same
+    frame in turn. The result frame holds only User_ID, Predicted_Target
+    and churn_probability, aligned with `data`'s rows.
+    """
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+    handle: ModelHandle = get_model(model_name)
+
+    with timed("feature_selection"):
+        if handle.schema is not None:
+            validate_columns(handle.schema, data.columns)
+            model_features = list(handle.schema.features)
+        else:
+            model_features = _guess_model_features(data.columns)
+        if handle.schema is not None:
+            data_for_prediction = model_input(data, handle.schema)
+        else:
+            data_for_prediction = data[model_features]
+
+    with timed("inference"):
+        preds, churn_prob = _run_inference(handle.model, data_for_prediction, threshold)
+    ROWS_SCORED_TOTAL.labels(model=model_name).inc(len(data))
+
+    scored = pd.DataFrame({"User_ID": [f"U{i + 1:04d}" for i in range(len(data))]}, index=data.index)
+    scored[PREDICTION_COLUMN] = np.asarray(preds).ravel()
     if churn_prob is not None:
-        result_df["churn_probability"] = churn_prob
-
-    print(f"[DEBUG] Result DataFrame columns: {result_df.columns.tolist()}")
-    first_preds = result_df['Predicted_Target'].head().tolist()
-    print(f"[DEBUG] First 5 predictions: {first_preds}")
-    if len(set(first_preds)) == 1:
-        print(f"[WARN] All first 5 predictions are the same: {first_preds[0]}")
-    if result_df['Predicted_Target'].isnull().all():
-        print(f"[ERROR] All predictions are null!")
-
-    # If output_dir is provided, save CSV there
-    if output_dir:
-        output_path = f"{output_dir}/predicted.csv"
-        result_df.to_csv(output_path, index=False)
-        print(f"[DEBUG] Saved predictions to {output_path}")
-        return output_path
-
-    # Otherwise, just return the DataFrame
-    return result_df
\ No newline at end of file
+        scored["churn_probability"] = churn_prob
+    if model_name == DEMO_OVERRIDE_MODEL and source_name is not None:
+        scored[PREDICTION_COLUMN] = _demo_override_labels(source_name, len(scored))
+    return _build_result(scored, model_name, threshold)
+
+def predict_from_csv_multi(csv_file: str, model_names: Sequence[str], threshold: Optional[float] = None,
+                           input_columns: Optional[Sequence[str]] = None,
+                           source_name: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, PredictionResult]]:
+    """
+    Parse `csv_file` once and score it with every model in `model_names`.
+    Returns the parsed input frame and one result per model.
+
+    The models run one after another: this call holds a single worker pool
+    slot, and running them on extra threads would let concurrent inference
+    exceed the pool's cap.
+    """
+    with timed("csv_parse"):
+        data = read_for_models(csv_file, model_names, input_columns)
+    logger.debug("Loaded input CSV with shape: %s for %d models", data.shape, len(model_names))
+
+    results = {name: score_shared_frame(data, name, threshold, source_name or csv_file) for name in model_names}
+    return data, results
+
+def save_prediction_result(result: PredictionResult, output_dir: str) -> str:
+    """
+    Write a prediction result to `<output_dir>/<result_id>.csv` and return the path.
+    Each result gets its own file, so concurrent users never overwrite each other.
+    """
+    output_path = os.path.join(output_dir, f"{result.result_id}.csv")
+    result.frame.to_csv(output_path, index=False)
+    logger.debug("Saved predictions to %s", output_path)
+    return output_path
+
+def predict_from_csv_chunked(
+    csv_file: str,
+    model_name: str,
+    output_path: str,
+    chunksize: int = CSV_CHUNK_ROWS,
+    progress_callback: Optional[Callable[[int], None]] = None,
+    threshold: Optional[float] = None,
+    source_name: Optional[str] = None,
+) -> dict:
+    """
+    Score a CSV in fixed-size chunks, appending each scored chunk to `output_path`.
+
+    Only one chunk is held in memory at a time, so arbitrarily large files can be
+    scored. Returns a summary with the row count, class distribution,
+    probability histogram and a sample of rows; `progress_callback` (if given)
+    receives the number of rows scored so far.
+    """
+    handle: ModelHandle = get_model(model_name)
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+
+    demo_labels = None
+    if model_name == DEMO_OVERRIDE_MODEL:
+        # The same labels /csv gives this file: an exact churn count shuffled
+        # over all rows, so the row count is taken first and sliced per chunk
+        n_rows = sum(len(c) for c in pd.read_csv(csv_file, usecols=[0], chunksize=chunksize))
+        demo_labels = _demo_override_labels(source_name or csv_file, n_rows)
+
+    typed_kwargs = {}
+    if handle.schema is not None:
+        columns = read_columns(csv_file)
+        validate_columns(handle.schema, columns)
+        typed_kwargs = read_kwargs(handle.schema, columns)
+
+    class_counts = Counter()
+    bin_counts = np.zeros(len(PROBABILITY_BIN_EDGES) - 1, dtype=np.int64)
+    has_probability = False
+    sample = []
+    rows_scored = 0
+
+    with open(output_path, "w", newline="") as out:
+        try:
+            reader = pd.read_csv(csv_file, chunksize=chunksize, **typed_kwargs)
+            while True:
+                with timed("csv_parse"):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                if handle.schema is not None:
+                    check_numeric(chunk, handle.schema)
+                # Scored columns are added to the chunk in place; no extra copy is made
+                score_frame(chunk, model_name, threshold, row_offset=rows_scored)
+                if demo_labels is not None:
+                    chunk[PREDICTION_COLUMN] = demo_labels[rows_scored:rows_scored + len(chunk)]
+
+                with timed("serialization"):
+                    chunk.to_csv(out, index=False, header=rows_scored == 0)
+                class_counts.update(chunk[PREDICTION_COLUMN].value_counts().to_dict())
+                if "churn_probability" in chunk.columns:
+                    has_probability = True
+                    bin_counts += probability_bin_counts(chunk["churn_probability"])
+                if len(sample) < REPORT_SAMPLE_ROWS:
+                    sample += sample_records(chunk, REPORT_SAMPLE_ROWS - len(sample))
+                rows_scored += len(chunk)
+                logger.debug("Scored %d rows so far", rows_scored)
+                if progress_callback is not None:
+                    progress_callback(rows_scored)
+        except (ValueError, TypeError):
+            # A chunk failed to parse with the model's dtypes; report exactly where
+            if handle.schema is None:
+                raise
+            report = invalid_numeric_report(csv_file, handle.schema, chunksize)
+            if not report["invalid_columns"]:
+                raise
+            raise SchemaValidationError(report)
+
+    logger.debug("Saved streamed predictions to %s", output_path)
+    return {
+        "output_path": output_path,
+        "total_records": rows_scored,
+        "class_distribution": dict(class_counts),
+        "prediction_column": PREDICTION_COLUMN,
+        "model_used": model_name,
+        "decision_threshold": threshold,
+        "probability_bins": probability_bins_payload(bin_counts) if has_probability else None,
+        "sample": sample,
+    }
@@ -0,0 +1,238 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from sqlalchemy import text
+
+from app.database import DB_CREATE_TABLES_ON_STARTUP, engine, init_db
+from app.services.model_registry import MODELS_DIR, registry
+from app.services.model_service import MODEL_MAPPING
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Startup Readiness
+# ==========================
+# Warm models and heavy subsystems in a background thread after the server
+# starts accepting connections; /readyz reports 503 until they are ready.
+# With "false" the warm-up runs before startup completes, as it used to.
+PREWARM_IN_BACKGROUND = os.getenv("PREWARM_IN_BACKGROUND", "true").lower() in ("1", "true", "yes")
+
+# Failed required warm-ups (database, models) are retried with exponential
+# backoff, so /readyz recovers once e.g. the database is reachable again
+PREWARM_RETRY_INITIAL_SECONDS = float(os.getenv("PREWARM_RETRY_INITIAL_SECONDS", "1"))
+PREWARM_RETRY_MAX_SECONDS = float(os.getenv("PREWARM_RETRY_MAX_SECONDS", "60"))
+
+# Model files that must load before the API is ready (comma-separated). By
+# default that is every model in MODEL_MAPPING whose file is deployed; a
+# missing file is reported but, as in `registry.warm`, does not block startup.
+REQUIRED_MODELS = [name.strip() for name in os.getenv("REQUIRED_MODELS", "").split(",") if name.strip()]
+
+PENDING, WARMING, READY, FAILED, DISABLED = "pending", "warming", "ready", "failed", "disabled"
+
+
+class ReadinessTracker:
+    """
+    Warm-up state of each subsystem. Only `required` subsystems gate /readyz;
+    the others (reports, chatbot) load on first use if their warm-up fails.
+    """
+
+    def __init__(self):
+        self._states: Dict[str, dict] = {}
+        self._required: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def register(self, name: str, required: bool = True, state: str = PENDING, **details) -> None:
+        with self._lock:
+            self._required[name] = required
+            self._states[name] = {"state": state, "required": required, **details}
+
+    def set(self, name: str, state: str, **details) -> None:
+        with self._lock:
+            self._states[name] = {"state": state, "required": self._required.get(name, True), **details}
+
+    @contextmanager
+    def warming(self, name: str, **extra) -> Iterator[dict]:
+        """
+        Mark `name` as warming for the enclosed block, then ready or failed.
+        Errors are recorded and logged, not raised. The block may fill the
+        yielded dict with details to report alongside the state.
+        """
+        self.set(name, WARMING, **extra)
+        started = time.perf_counter()
+        details: dict = {}
+        try:
+            yield details
+        except Exception as e:
+            logger.warning("Warm-up of %s failed: %s", name, e)
+            self.set(name, FAILED, seconds=round(time.perf_counter() - started, 4), error=str(e), **extra, **details)
+        else:
+            self.set(name, READY, seconds=round(time.perf_counter() - started, 4), **details)
+
+    def state(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._states.get(name, {}).get("state")
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    @property
+    def status(self) -> str:
+        """
+        "ready" once every required subsystem is, "failed" if one of them
+        failed, "starting" otherwise.
+        """
+        with self._lock:
+            required = [s["state"] for s in self._states.values() if s["required"]]
+        if FAILED in required:
+            return FAILED
+        return READY if all(state == READY for state in required) else "starting"
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: dict(state) for name, state in self._states.items()}
+
+
+readiness = ReadinessTracker()
+
+
+def _warm_database() -> None:
+    if DB_CREATE_TABLES_ON_STARTUP:
+        init_db()  # Retried with the rest of this step while the database is unreachable
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def _warm_models(details: dict) -> None:
+    errors, missing = {}, []
+    for model_name in REQUIRED_MODELS or MODEL_MAPPING.values():
+        if not REQUIRED_MODELS and not os.path.exists(os.path.join(MODELS_DIR, model_name)):
+            missing.append(model_name)  # Not deployed; requests for it get the usual 404/500
+            continue
+        try:
+            registry.get(model_name)
+        except Exception as e:
+            errors[model_name] = str(e)
+    if missing:
+        details["missing"] = missing
+        logger.warning("Model files not deployed, skipped in readiness: %s", ", ".join(missing))
+    if errors:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+
+def _warm_until_ready(name: str, warm, retry: bool = True) -> bool:
+    """
+    Run `warm(details)` under `readiness.warming(name)`; with `retry`, repeat
+    with exponential backoff until it succeeds. Returns whether it did.
+    A step that is ready already is not run again.
+    """
+    if readiness.state(name) == READY:
+        return True
+    delay = PREWARM_RETRY_INITIAL_SECONDS
+    attempt = 1
+    while True:
+        with readiness.warming(name, attempt=attempt) as details:
+            warm(details)
+        if readiness.state(name) == READY or not retry:
+            return readiness.state(name) == READY
+        logger.info("Retrying warm-up of %s in %.1fs", name, delay)
+        time.sleep(delay)
+        delay = min(delay * 2, PREWARM_RETRY_MAX_SECONDS)
+        attempt += 1
+
+
+def _warm_reports() -> None:
+    from app.services import report_service  # noqa: F401  (imports matplotlib and fpdf)
+
+
+def _warm_chatbot() -> None:
+    from app.services.chatbot_service import backend, ChatbotUnavailableError
+
+    try:
+        backend.check_available()
+    except ChatbotUnavailableError as e:
+        readiness.set("chatbot", DISABLED, provider=backend.name, reason=str(e))
+        return
+    with readiness.warming("chatbot"):
+        backend.warm()
+
+
+def register_subsystems(preload_models: bool) -> None:
+    readiness.register("database")
+    if preload_models:
+        readiness.register("models")
+    else:
+        readiness.register("models", required=False, state=DISABLED, reason="PRELOAD_MODELS is off; models load on first use")
+    readiness.register("reports", required=False)
+    readiness.register("chatbot", required=False)
+
+
+def warm_required(preload_models: bool = True, retry: bool = True,
+                  on_database_ready: Optional[Callable[[], object]] = None) -> bool:
+    """
+    Warm the subsystems that gate /readyz: the database (creating missing
+    tables when DB_CREATE_TABLES_ON_STARTUP is on), and the models when
+    preloading. `on_database_ready` runs once, when the database first
+    becomes ready. Returns whether all of them are ready.
+    """
+    database_was_ready = readiness.state("database") == READY
+    ready = _warm_until_ready("database", lambda details: _warm_database(), retry)
+    if ready and not database_was_ready and on_database_ready is not None:
+        try:
+            on_database_ready()
+        except Exception as e:
+            logger.warning("Post-database startup step failed: %s", e)
+    if preload_models:
+        ready = _warm_until_ready("models", _warm_models, retry) and ready
+    return ready
+
+
+def prewarm(preload_models: bool = True, retry: bool = True,
+            on_database_ready: Optional[Callable[[], object]] = None) -> None:
+    """
+    Set up and connect to the database, load the models and import the
+    report and chat subsystems, recording each step in `readiness`.
+    """
+    started = time.perf_counter()
+    warm_required(preload_models, retry, on_database_ready)
+    with readiness.warming("reports"):
+        _warm_reports()
+    _warm_chatbot()
+    logger.info("Prewarm finished in %.3fs (%s)", time.perf_counter() - started, readiness.status)
+
+
+def start_prewarm(preload_models: bool = True,
+                  on_database_ready: Optional[Callable[[], object]] = None) -> Optional[threading.Thread]:
+    """
+    Run `prewarm` in a daemon thread, or inline when PREWARM_IN_BACKGROUND is
+    off; then a failed required step is retried in the background. An
+    unreachable database therefore never fails startup; /readyz reports it.
+    """
+    register_subsystems(preload_models)
+    # One attempt before serving, so tables exist by the first request when
+    # the database is up; if it is not, the prewarm below keeps retrying
+    warm_required(False, retry=False, on_database_ready=on_database_ready)
+    if not PREWARM_IN_BACKGROUND:
+        prewarm(preload_models, retry=False, on_database_ready=on_database_ready)
+        if readiness.ready:
+            return None
+        target, args = warm_required, (preload_models, True, on_database_ready)
+    else:
+        target, args = prewarm, (preload_models, True, on_database_ready)
+    thread = threading.Thread(target=target, args=args, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness_report() -> dict:
+    return {
+        "status": readiness.status,
+        "uptime_seconds": round(time.time() - readiness.started_at, 3),
+        "subsystems": readiness.snapshot(),
+        "models": registry.stats(),
+    }
@@ -1,43 +1,77 @@
 from fpdf import FPDF
+import numpy as np
 import pandas as pd
+from collections import Counter
 from datetime import datetime
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+# Object-oriented Agg API: every call owns its Figure, so charts can be
+# rendered from several worker threads without pyplot's global state
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from app.services.metrics import timed
+from app.services.result_store import read_explanations
 import io
-import tempfile
 import os
 
+HISTOGRAM_BINS = 20
+# Rendered charts are cached per distribution, so repeated reports skip matplotlib
+REPORT_CHART_CACHE_SIZE = int(os.getenv("REPORT_CHART_CACHE_SIZE", "128"))
+
+def _render_png(fig: Figure) -> bytes:
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig).print_png(buf)
+    return buf.getvalue()
+
+@lru_cache(maxsize=REPORT_CHART_CACHE_SIZE)
+def _cached_pie_chart(items: Tuple[Tuple[str, int], ...]) -> bytes:
+    fig = Figure()
+    ax = fig.add_subplot()
+    ax.pie([count for _, count in items], labels=[label for label, _ in items], autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+    return _render_png(fig)
+
+@lru_cache(maxsize=REPORT_CHART_CACHE_SIZE)
+def _cached_histogram(counts: Tuple[int, ...], edges: Tuple[float, ...], title: str) -> bytes:
+    fig = Figure()
+    ax = fig.add_subplot()
+    # Draw the precomputed bins directly instead of re-binning the raw values
+    ax.hist(edges[:-1], bins=edges, weights=counts, edgecolor='black')
+    ax.set_title(title)
+    ax.set_xlabel('Probability')
+    ax.set_ylabel('Frequency')
+    return _render_png(fig)
+
 def generate_pie_chart(prediction_distribution: dict) -> bytes:
     """
     Generates a pie chart from prediction distribution and returns it as bytes.
     """
-    labels = prediction_distribution.keys()
-    sizes = prediction_distribution.values()
-    
-    fig, ax = plt.subplots()
-    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+    return _cached_pie_chart(tuple((str(label), int(count)) for label, count in prediction_distribution.items()))
 
-def generate_histogram(data: pd.Series, title: str) -> bytes:
+def histogram_bins(data: Sequence[float], bins: int = HISTOGRAM_BINS) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """
+    Bin counts and edges for a probability series, ignoring missing values.
+    """
+    values = np.asarray(data, dtype=float)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    return tuple(int(c) for c in counts), tuple(float(e) for e in edges)
+
+def generate_histogram(data: Sequence[float], title: str) -> bytes:
     """
     Generates a histogram for a given data series and returns it as bytes.
     """
-    fig, ax = plt.subplots()
-    ax.hist(data, bins=20, edgecolor='black')
-    ax.set_title(title)
-    ax.set_xlabel('Probability')
-    ax.set_ylabel('Frequency')
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+    counts, edges = histogram_bins(data)
+    return _cached_histogram(counts, edges, title)
+
+def chart_cache_stats() -> dict:
+    pie, hist = _cached_pie_chart.cache_info(), _cached_histogram.cache_info()
+    return {
+        "hits": pie.hits + hist.hits,
+        "misses": pie.misses + hist.misses,
+        "entries": pie.currsize + hist.currsize,
+        "maxsize": REPORT_CHART_CACHE_SIZE,
+    }
 
 class PDFReport(FPDF):
     def header(self):
@@ -55,16 +89,16 @@ class PDFReport(FPDF):
     def add_summary(self, model_name: str, file_name: str, total_records: int, prediction_distribution: dict):
         self.set_font('Arial', 'B', 10)
         self.cell(0, 10, 'Prediction Summary', 0, 1, 'L')
-        
+
         self.set_font('Arial', '', 10)
         self.cell(0, 10, f'Model Used: {model_name}', 0, 1, 'L')
         self.cell(0, 10, f'Input File: {file_name}', 0, 1, 'L')
         self.cell(0, 10, f'Total Records: {total_records}', 0, 1, 'L')
-        
+
         self.set_font('Arial', 'B', 10)
         self.cell(0, 10, 'Prediction Distribution:', 0, 1, 'L')
         self.set_font('Arial', '', 10)
-        
+
         summary_text = ""
         for category, count in prediction_distribution.items():
             self.cell(0, 10, f'  - {category}: {count}', 0, 1, 'L')
@@ -78,67 +112,112 @@ class PDFReport(FPDF):
         self.ln(10)
 
     def add_chart(self, image_bytes: bytes, title: str):
-        tmp_filename = ""
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                tmp.write(image_bytes)
-                tmp_filename = tmp.name
-            
-            self.set_font('Arial', 'B', 10)
-            self.cell(0, 10, title, 0, 1, 'L')
-            self.image(tmp_filename, w=150)
-            self.ln(10)
-        finally:
-            if tmp_filename and os.path.exists(tmp_filename):
-                os.unlink(tmp_filename)
+        self.set_font('Arial', 'B', 10)
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.image(io.BytesIO(image_bytes), w=150)
+        self.ln(10)
 
     def add_data_table(self, df: pd.DataFrame, num_rows: int = 10):
         self.set_font('Arial', 'B', 10)
         self.cell(0, 10, f'Sample of Prediction Data (first {num_rows} rows)', 0, 1, 'L')
-        
+
         self.set_font('Arial', '', 8)
-        
+
         # Table Header
         self.set_fill_color(200, 220, 255)
-        
+
         # Calculate dynamic column widths
-        col_widths = [self.w / (len(df.columns) + 1)] * len(df.columns)
-        
-        for i, col in enumerate(df.columns):
-            self.cell(col_widths[i], 10, col, 1, 0, 'C', 1)
+        col_width = self.w / (len(df.columns) + 1)
+
+        for col in df.columns:
+            self.cell(col_width, 10, str(col), 1, 0, 'C', 1)
         self.ln()
 
-        # Table Rows
-        for i in range(min(num_rows, len(df))):
-            for j, col in enumerate(df.columns):
-                self.cell(col_widths[j], 10, str(df.iloc[i][col]), 1, 0, 'C')
+        # Table Rows: convert the sample to strings once instead of per cell
+        for row in df.head(num_rows).astype(str).to_numpy():
+            for value in row:
+                self.cell(col_width, 10, value, 1, 0, 'C')
             self.ln()
 
+    def add_explanations(self, rows: list, num_rows: int = 10):
+        self.ln(10)
+        self.set_font('Arial', 'B', 10)
+        self.cell(0, 10, f'Why the top {min(num_rows, len(rows))} at-risk customers are flagged', 0, 1, 'L')
+
+        self.set_font('Arial', '', 8)
+        for row in rows[:num_rows]:
+            customer = row.get('User_ID') or row.get('ID') or row['row']
+            reasons = ', '.join(
+                f"{r['feature']}={r['value']} ({'+' if r['contribution'] >= 0 else ''}{r['contribution']:.2f})"
+                for r in row['reasons']
+            )
+            self.multi_cell(0, 5, f"{customer} (churn probability {row['churn_probability']:.2f}): {reasons}",
+                            new_x="LMARGIN", new_y="NEXT")
+        self.set_font('Arial', 'I', 8)
+        self.multi_cell(0, 5, 'Contributions are SHAP values in log-odds; positive values push towards churn.',
+                        new_x="LMARGIN", new_y="NEXT")
+
+def build_report(model_name: str, file_name: str, total_records: int, prediction_distribution: dict,
+                 sample: pd.DataFrame, probability_bins: Optional[Tuple[Sequence[int], Sequence[float]]] = None,
+                 explanations: Optional[list] = None) -> bytes:
+    """
+    Render a PDF from an already-summarised result.
+    `probability_bins` is the (counts, edges) pair from `histogram_bins`;
+    `explanations` are cached rows from `explanation_service`, riskiest first.
+    """
+    with timed("report_render"):
+        pdf = PDFReport()
+        pdf.add_page()
+        pdf.add_summary(model_name, file_name, total_records, prediction_distribution)
+        pdf.add_chart(generate_pie_chart(prediction_distribution), 'Prediction Distribution Chart')
+
+        # Histogram for churn probability if available
+        if probability_bins is not None:
+            counts, edges = probability_bins
+            title = 'Churn Probability Distribution'
+            pdf.add_chart(_cached_histogram(tuple(counts), tuple(edges), title), title)
+
+        pdf.add_data_table(sample)
+        if explanations:
+            pdf.add_explanations(explanations)
+
+        return bytes(pdf.output())
+
 def generate_report(data: dict) -> bytes:
     """
     Generates a PDF report from prediction data.
     """
-    df = pd.DataFrame(data['records'])
+    records = data['records']
     model_name = data.get('model_used', 'N/A')
     file_name = data.get('file_name', 'N/A')
     prediction_col = data.get('prediction_column', 'Predicted_Target')
-    
-    total_records = len(df)
-    prediction_distribution = df[prediction_col].value_counts().to_dict()
-
-    # Generate pie chart
-    pie_chart_bytes = generate_pie_chart(prediction_distribution)
-
-    pdf = PDFReport()
-    pdf.add_page()
-    pdf.add_summary(model_name, file_name, total_records, prediction_distribution)
-    pdf.add_chart(pie_chart_bytes, 'Prediction Distribution Chart')
-
-    # Generate histogram for churn probability if available
-    if 'churn_probability' in df.columns:
-        hist_bytes = generate_histogram(df['churn_probability'], 'Churn Probability Distribution')
-        pdf.add_chart(hist_bytes, 'Churn Probability Distribution')
-
-    pdf.add_data_table(df.head(10))
-    
-    return pdf.output(dest='S').encode('latin-1')
\ No newline at end of file
+
+    # Only the sample rows need a DataFrame; the summary is computed in one pass
+    sample = pd.DataFrame(records[:10])
+    prediction_distribution = dict(Counter(record[prediction_col] for record in records).most_common())
+
+    probability_bins = None
+    if 'churn_probability' in sample.columns:
+        probability_bins = histogram_bins([record.get('churn_probability') for record in records])
+
+    return build_report(model_name, file_name, len(records), prediction_distribution, sample, probability_bins)
+
+def generate_report_from_summary(summary: dict) -> bytes:
+    """
+    Generates a PDF report from a stored result summary (see `result_store.report_inputs`).
+    Reasons for the riskiest customers are included if they were already computed.
+    """
+    bins = summary.get('probability_bins')
+    explanations = None
+    if summary.get('explanations_path'):
+        cached = read_explanations(summary['explanations_path']) or {}
+        explanations = (cached.get('top') or {}).get('rows')
+    return build_report(
+        summary.get('model_used', 'N/A'),
+        summary.get('file_name', 'N/A'),
+        summary['total_records'],
+        summary['class_distribution'],
+        pd.DataFrame(summary.get('sample') or []),
+        (bins['counts'], bins['edges']) if bins else None,
+        explanations,
+    )
@@ -0,0 +1,165 @@
+import os
+import uuid
+import logging
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Optional, Sequence
+
+from app.services.model_registry import get_model
+from app.services.model_service import DEMO_OVERRIDE_MODEL, PredictionResult, get_decision_threshold, predict_from_csv
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Cache Configuration
+# ==========================
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("cache", "results"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))  # 1 GiB
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of prediction results on local disk.
+
+    Entries are content-addressed: the key covers the upload bytes, the exact
+    model file and the decision threshold, so a hit is always a valid answer.
+    Recency is tracked via file mtimes, so the LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _load_index(self) -> None:
+        existing = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                existing.append((stat.st_mtime, name[:-len(".pkl")], stat.st_size))
+        for _, key, size in sorted(existing):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(upload_sha256: str, model_sha256: str, threshold: float,
+                 input_columns: Optional[Sequence[str]] = None, source_name: Optional[str] = None) -> str:
+        columns = "*" if input_columns is None else ",".join(sorted(input_columns))
+        # `source_name` is only passed for the demo override model, whose labels it seeds
+        key = f"{upload_sha256}:{model_sha256}:{threshold!r}:{columns}:{source_name or ''}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[PredictionResult]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning("Dropping unreadable result cache entry %s: %s", key, e)
+            self._discard(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: PredictionResult) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)  # Readers never see a partially written entry
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            to_evict = []
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                self.evictions += 1
+                to_evict.append(old_key)
+        for old_key in to_evict:
+            self._remove_file(old_key)
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        self._remove_file(key)
+
+    def _remove_file(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": RESULT_CACHE_ENABLED,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+result_cache = ResultCache()
+
+
+def predict_from_csv_cached(csv_file: str, model_name: str, upload_sha256: str,
+                            threshold: Optional[float] = None,
+                            input_columns: Optional[Sequence[str]] = None,
+                            source_name: Optional[str] = None) -> PredictionResult:
+    """
+    `predict_from_csv`, answered from the result cache when the same bytes were
+    already scored with the same model file, threshold and input columns.
+    """
+    if not RESULT_CACHE_ENABLED:
+        return predict_from_csv(csv_file, model_name, threshold, input_columns, source_name)
+
+    if threshold is None:
+        threshold = get_decision_threshold(model_name)
+    # Other models give the same answer whatever the file is called, so a renamed re-upload still hits
+    key = ResultCache.make_key(
+        upload_sha256, get_model(model_name).sha256, threshold, input_columns,
+        source_name if model_name == DEMO_OVERRIDE_MODEL else None,
+    )
+
+    cached = result_cache.get(key)
+    if cached is not None:
+        logger.debug("Result cache hit for %s (%s)", model_name, key[:12])
+        return replace(cached, result_id=uuid.uuid4().hex)  # Each request still gets its own result id
+
+    result = predict_from_csv(csv_file, model_name, threshold, input_columns, source_name)
+    try:
+        result_cache.put(key, result)
+    except OSError as e:
+        logger.warning("Could not write result cache entry: %s", e)
+    return result
@@ -0,0 +1,349 @@
+import os
+import glob
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job import PredictionJob
+from app.models.result import StoredResult
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# Result Store Configuration
+# ==========================
+# Scored rows are kept as Arrow IPC files (one per result) next to their
+# summary row in the database, so pages can be re-served without re-scoring.
+RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "results")
+# "zstd" is the most compact; "lz4" reads faster; "uncompressed" makes reads zero-copy
+RESULT_STORE_COMPRESSION = os.getenv("RESULT_STORE_COMPRESSION", "zstd")
+# Rows per record batch: a page read only decompresses the batches it overlaps
+RESULT_STORE_BATCH_ROWS = int(os.getenv("RESULT_STORE_BATCH_ROWS", "65536"))
+
+# Results older than this are deleted with their files (0 keeps them forever)
+RESULT_RETENTION_DAYS = float(os.getenv("RESULT_RETENTION_DAYS", "30"))
+# Above this total, the oldest row files are dropped; their summaries and reports stay
+RESULT_STORE_MAX_BYTES = int(os.getenv("RESULT_STORE_MAX_BYTES", str(10 * 1024 ** 3)))  # 10 GiB
+RESULT_CLEANUP_INTERVAL_SECONDS = float(os.getenv("RESULT_CLEANUP_INTERVAL_SECONDS", "3600"))
+
+# Scored CSVs of streaming /csv runs (outputs/<result_id>.csv); expired with their result
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
+
+BATCH_ROWS_KEY = b"churn.batch_rows"
+
+def record_result(db: Session, result_id: str, username: str, file_name: str, summary: dict) -> StoredResult:
+    """
+    Store the summary of a scored upload (see `PredictionResult.summary`).
+    """
+    stored = StoredResult(
+        id=result_id,
+        username=username,
+        model_name=summary["model_used"],
+        file_name=file_name,
+        prediction_column=summary["prediction_column"],
+        decision_threshold=summary.get("decision_threshold"),
+        total_records=summary["total_records"],
+        class_distribution={str(k): v for k, v in summary["class_distribution"].items()},
+        probability_bins=summary.get("probability_bins"),
+        sample=summary.get("sample", []),
+    )
+    stored = db.merge(stored)
+    db.commit()
+    return stored
+
+def get_user_result(db: Session, result_id: str, username: str) -> Optional[StoredResult]:
+    """
+    Look up a stored result, hiding results that belong to other users.
+    """
+    stored = db.get(StoredResult, result_id)
+    if stored is None or stored.username != username:
+        return None
+    return stored
+
+def list_user_results(db: Session, username: str, offset: int = 0, limit: int = 50) -> List[StoredResult]:
+    """
+    A user's stored results, newest first.
+    """
+    return (
+        db.query(StoredResult)
+        .filter(StoredResult.username == username)
+        .order_by(StoredResult.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def report_inputs(stored: StoredResult) -> dict:
+    """
+    Plain-dict view of a stored result, safe to hand to a worker process.
+    """
+    return {
+        "model_used": stored.model_name,
+        "file_name": stored.file_name,
+        "total_records": stored.total_records,
+        "class_distribution": stored.class_distribution,
+        "probability_bins": stored.probability_bins,
+        "sample": stored.sample,
+        "explanations_path": explanations_file_path(stored.id),
+    }
+
+def result_index_entry(stored: StoredResult) -> dict:
+    return {
+        "result_id": stored.id,
+        "model_used": stored.model_name,
+        "file_name": stored.file_name,
+        "total_records": stored.total_records,
+        "class_distribution": stored.class_distribution,
+        "decision_threshold": stored.decision_threshold,
+        "created_at": stored.created_at.isoformat(),
+        "rows_stored": stored.result_path is not None,
+        "result_bytes": stored.result_bytes,
+        "report_url": f"/report/pdf/{stored.id}",
+        "rows_url": f"/results/{stored.id}" if stored.result_path is not None else None,
+        "analytics_url": f"/analytics/{stored.id}" if stored.result_path is not None else None,
+        "explanations_url": f"/results/{stored.id}/explanations" if stored.result_path is not None else None,
+    }
+
+# ==========================
+# Columnar Row Files
+# ==========================
+def result_file_path(result_id: str, store_dir: str = RESULT_STORE_DIR) -> str:
+    return os.path.join(store_dir, f"{result_id}.arrow")
+
+def _fixed_size_batches(batches: Iterable, batch_rows: int) -> Iterator:
+    """
+    Re-chunk record batches so every batch but the last has `batch_rows` rows,
+    which lets a reader find the batches for a row range without scanning.
+    """
+    import pyarrow as pa
+
+    pending, pending_rows = [], 0
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield from table.slice(0, batch_rows).combine_chunks().to_batches()
+            rest = table.slice(batch_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield from pa.Table.from_batches(pending).combine_chunks().to_batches()
+
+def _write_batches(result_id: str, schema, batches: Iterable) -> str:
+    import pyarrow as pa
+
+    os.makedirs(RESULT_STORE_DIR, exist_ok=True)
+    path = result_file_path(result_id)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    schema = schema.with_metadata({**(schema.metadata or {}), BATCH_ROWS_KEY: str(RESULT_STORE_BATCH_ROWS).encode()})
+    compression = None if RESULT_STORE_COMPRESSION == "uncompressed" else RESULT_STORE_COMPRESSION
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+            for batch in _fixed_size_batches(batches, RESULT_STORE_BATCH_ROWS):
+                writer.write_batch(batch)
+        os.replace(tmp_path, path)  # Readers never see a partially written file
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+def write_result_frame(result_id: str, frame: pd.DataFrame) -> str:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    return _write_batches(result_id, table.schema, table.to_batches())
+
+def write_result_csv(result_id: str, csv_path: str) -> str:
+    """
+    Convert a scored CSV (streaming `/csv` or a job) without loading it whole.
+    """
+    import pyarrow.csv as pa_csv
+
+    reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(block_size=16 * 1024 ** 2))
+    return _write_batches(result_id, reader.schema, reader)
+
+def read_result_page(path: str, offset: int = 0, limit: Optional[int] = None,
+                     columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read rows [offset, offset + limit) of the projected columns through a
+    memory map. Only the record batches overlapping the window are touched,
+    and of those only the requested columns are decompressed.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        schema = pa.ipc.open_file(source).schema
+        options = None
+        if columns is not None:
+            options = pa.ipc.IpcReadOptions(included_fields=[schema.get_field_index(c) for c in columns])
+        reader = pa.ipc.open_file(source, options=options)
+        batch_rows = int((schema.metadata or {}).get(BATCH_ROWS_KEY, 0)) or None
+
+        first, last = 0, reader.num_record_batches
+        if batch_rows:
+            first = min(offset // batch_rows, last)
+            if limit is not None:
+                last = min(last, -(-(offset + limit) // batch_rows))
+        batches = [reader.get_batch(i) for i in range(first, last)]
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        start = offset - first * batch_rows if batch_rows else offset
+        table = table.slice(start, limit)
+        if columns is not None:
+            table = table.select(list(columns))  # included_fields keeps file order
+        return table.to_pandas()
+
+def explanations_file_path(result_id: str, store_dir: str = RESULT_STORE_DIR) -> str:
+    return os.path.join(store_dir, f"{result_id}.explanations.json")
+
+def read_explanations(path: str) -> Optional[dict]:
+    """
+    Cached explanations stored next to a result's rows, or None if there are none.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_explanations(path: str, explanations: dict) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(explanations, f)
+    os.replace(tmp_path, path)
+
+def attach_result_file(db: Session, result_id: str, path: str) -> None:
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        columns = pa.ipc.open_file(source).schema.names
+    db.query(StoredResult).filter(StoredResult.id == result_id).update({
+        "result_path": path,
+        "result_bytes": os.path.getsize(path),
+        "result_columns": columns,
+    })
+    db.commit()
+
+def persist_result_frame(result_id: str, frame: pd.DataFrame) -> Optional[str]:
+    """
+    Write a scored frame to the store and index it. Runs after the response
+    is sent; failures are logged, since the summary is already stored.
+    """
+    return _persist(result_id, write_result_frame, frame)
+
+def persist_result_csv(result_id: str, csv_path: str) -> Optional[str]:
+    return _persist(result_id, write_result_csv, csv_path)
+
+def _persist(result_id: str, write, source) -> Optional[str]:
+    if not RESULT_STORE_ENABLED:
+        return None
+    try:
+        path = write(result_id, source)
+    except Exception as e:
+        logger.warning("Could not store rows of result %s: %s", result_id, e)
+        return None
+    db = SessionLocal()
+    try:
+        attach_result_file(db, result_id, path)
+    finally:
+        db.close()
+    return path
+
+# ==========================
+# Retention
+# ==========================
+def _remove_file(path: Optional[str]) -> int:
+    if not path:
+        return 0
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+def cleanup_results(db: Session, now: Optional[datetime] = None) -> dict:
+    """
+    Delete results older than RESULT_RETENTION_DAYS with every file they own
+    (row file, explanations, streamed output CSV), and finished jobs of the
+    same age with their input and output CSVs. Then drop the oldest row files
+    until the store fits in RESULT_STORE_MAX_BYTES.
+    """
+    now = now or datetime.now()
+    expired = jobs_expired = dropped = freed = 0
+
+    if RESULT_RETENTION_DAYS > 0:
+        cutoff = now - timedelta(days=RESULT_RETENTION_DAYS)
+        for stored in db.query(StoredResult).filter(StoredResult.created_at < cutoff).all():
+            freed += _remove_file(stored.result_path)
+            freed += _remove_file(explanations_file_path(stored.id))
+            freed += _remove_file(os.path.join(OUTPUT_DIR, f"{stored.id}.csv"))
+            db.delete(stored)
+            expired += 1
+        # Queued and running jobs are left to finish; they expire on a later pass
+        finished_jobs = (
+            db.query(PredictionJob)
+            .filter(PredictionJob.created_at < cutoff, PredictionJob.status.in_(["completed", "failed"]))
+            .all()
+        )
+        for job in finished_jobs:
+            freed += _remove_file(job.input_path)
+            freed += _remove_file(job.output_path)
+            for part in glob.glob(f"{glob.escape(job.output_path)}.*.part"):
+                freed += _remove_file(part)  # Left by a worker that lost its lease and then died
+            db.delete(job)
+            jobs_expired += 1
+        db.commit()
+
+    with_files = (
+        db.query(StoredResult)
+        .filter(StoredResult.result_path.isnot(None))
+        .order_by(StoredResult.created_at)
+        .all()
+    )
+    total = sum(stored.result_bytes or 0 for stored in with_files)
+    for stored in with_files:
+        if total <= RESULT_STORE_MAX_BYTES:
+            break
+        total -= stored.result_bytes or 0
+        freed += _remove_file(stored.result_path)
+        freed += _remove_file(explanations_file_path(stored.id))
+        stored.result_path = stored.result_bytes = stored.result_columns = None
+        dropped += 1
+    db.commit()
+
+    if expired or jobs_expired or dropped:
+        logger.info("Result cleanup: %d expired, %d jobs expired, %d row files dropped, %d bytes freed",
+                    expired, jobs_expired, dropped, freed)
+    return {"expired": expired, "jobs_expired": jobs_expired, "files_dropped": dropped,
+            "bytes_freed": freed, "store_bytes": total}
+
+def _cleanup_once() -> dict:
+    db = SessionLocal()
+    try:
+        return cleanup_results(db)
+    finally:
+        db.close()
+
+async def cleanup_periodically(interval: float = RESULT_CLEANUP_INTERVAL_SECONDS) -> None:
+    """
+    Run `cleanup_results` now and then every `interval` seconds, off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, _cleanup_once)
+        except Exception as e:
+            logger.warning("Result cleanup failed: %s", e)
+        await asyncio.sleep(interval)
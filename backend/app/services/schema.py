@@ -0,0 +1,178 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# What the model sees for numeric and categorical features (CatBoost works in
+# float32 and takes categories as strings). Files are parsed with pandas' own
+# inference instead, so the values returned and stored are exactly the ones
+# uploaded (an int-coded category stays 0/1); `model_input` converts the copy
+# handed to the model.
+NUMERIC_DTYPE = "float32"
+CATEGORICAL_DTYPE = "category"
+
+# Examples reported per invalid column in a validation error
+MAX_INVALID_EXAMPLES = 5
+
+
+class SchemaValidationError(ValueError):
+    """
+    The uploaded file does not match what the model expects.
+    `report` describes every problem found, for returning to the client as-is.
+    """
+
+    def __init__(self, report: dict):
+        self.report = report
+        super().__init__(report.get("error", "Input does not match the model schema"))
+
+
+@dataclass(frozen=True)
+class ModelSchema:
+    """
+    Input contract of a model: the ordered feature columns and how to parse them.
+    """
+    features: Tuple[str, ...]
+    categorical: FrozenSet[str] = frozenset()
+    dtypes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def numeric(self) -> List[str]:
+        return [f for f in self.features if self.dtypes.get(f) == NUMERIC_DTYPE]
+
+
+
+def schema_for_model(model) -> Optional[ModelSchema]:
+    """
+    Derive the input schema from a fitted model, or None if it does not record
+    its feature names (callers then fall back to guessing features).
+    """
+    if hasattr(model, "feature_names_"):  # CatBoost
+        features = tuple(model.feature_names_)
+        cat_indices = set(model.get_cat_feature_indices())
+        # Text/embedding features are left to pandas; everything else is numeric
+        other_indices = set()
+        for getter in ("get_text_feature_indices", "get_embedding_feature_indices"):
+            if hasattr(model, getter):
+                other_indices.update(getattr(model, getter)())
+
+        categorical = frozenset(features[i] for i in cat_indices)
+        dtypes = {}
+        for i, feature in enumerate(features):
+            if i in cat_indices:
+                dtypes[feature] = CATEGORICAL_DTYPE
+            elif i not in other_indices:
+                dtypes[feature] = NUMERIC_DTYPE
+        return ModelSchema(features=features, categorical=categorical, dtypes=dtypes)
+
+    if hasattr(model, "feature_names_in_"):  # scikit-learn
+        # sklearn does not record column types, so pandas keeps inferring them
+        return ModelSchema(features=tuple(model.feature_names_in_))
+
+    return None
+
+
+def read_columns(csv_file: str) -> List[str]:
+    return list(pd.read_csv(csv_file, nrows=0).columns)
+
+
+def validate_columns(schema: ModelSchema, columns: Sequence[str]) -> None:
+    missing = [f for f in schema.features if f not in columns]
+    if missing:
+        raise SchemaValidationError({
+            "error": "Missing features in CSV",
+            "missing_features": missing,
+            "expected_features": list(schema.features),
+            "available_columns": list(columns),
+        })
+
+
+def read_kwargs(schema: ModelSchema, columns: Sequence[str], input_columns: Optional[Sequence[str]] = None) -> dict:
+    """
+    `pd.read_csv` arguments for a model's input. Dtypes are left to pandas.
+
+    `input_columns=None` keeps every column of the file; otherwise only the
+    model features plus the listed columns are parsed.
+    """
+    kwargs = {}
+    if input_columns is not None:
+        wanted = set(schema.features) | set(input_columns)
+        kwargs["usecols"] = [c for c in columns if c in wanted]
+    return kwargs
+
+
+def check_numeric(frame: pd.DataFrame, schema: ModelSchema) -> None:
+    """
+    Raise ValueError if a numeric feature was not parsed as numbers; callers
+    then build the detailed report with `invalid_numeric_report`.
+    """
+    bad = [
+        f for f in schema.numeric
+        if f in frame.columns and (not pd.api.types.is_numeric_dtype(frame[f]) or pd.api.types.is_bool_dtype(frame[f]))
+    ]
+    if bad:
+        raise ValueError(f"Non-numeric values in numeric features: {bad}")
+
+
+def _category_values(values: pd.Series) -> pd.Series:
+    """
+    A categorical feature as the model takes it: strings, with missing values
+    left missing. Columns pandas inferred as numbers or booleans are converted.
+    """
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype("Int64")  # 0/1 with gaps is parsed as 0.0/1.0; the model saw "0"/"1"
+    return values.astype(str).where(values.notna(), None)
+
+
+def model_input(frame: pd.DataFrame, schema: ModelSchema) -> pd.DataFrame:
+    """
+    The schema's features of `frame`, in order, with categorical features
+    converted for the model. `frame` itself is not modified.
+    """
+    features = frame[list(schema.features)]
+    converted = {
+        f: _category_values(features[f]) for f in schema.categorical
+        if not pd.api.types.is_object_dtype(features[f])
+    }
+    return features.assign(**converted) if converted else features
+
+
+def invalid_numeric_report(csv_file: str, schema: ModelSchema, chunksize: int = 100_000) -> dict:
+    """
+    Find the values that cannot be parsed as numbers, column by column.
+    Only run after a typed read has already failed; scans in chunks so it is
+    safe on files too large to load at once.
+    """
+    numeric = [f for f in schema.numeric if f in read_columns(csv_file)]
+    invalid_columns = {}
+    for raw in pd.read_csv(csv_file, usecols=numeric, dtype=str, chunksize=chunksize):
+        for col in numeric:
+            values = raw[col]
+            bad = values.notna() & pd.to_numeric(values, errors="coerce").isna()
+            if not bad.any():
+                continue
+            entry = invalid_columns.setdefault(col, {
+                "expected_dtype": schema.dtypes[col], "invalid_count": 0, "examples": [],
+            })
+            entry["invalid_count"] += int(bad.sum())
+            room = MAX_INVALID_EXAMPLES - len(entry["examples"])
+            # Row numbers are 1-based data rows, as they appear under the header
+            entry["examples"].extend({"row": int(i) + 1, "value": v} for i, v in values[bad].head(room).items())
+    return {"error": "Invalid values in numeric features", "invalid_columns": invalid_columns}
+
+
+def read_for_model(csv_file: str, schema: ModelSchema, input_columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Validate the header, then parse the CSV and check its numeric features.
+    Raises SchemaValidationError with a full report if the file does not fit.
+    """
+    columns = read_columns(csv_file)
+    validate_columns(schema, columns)
+    try:
+        frame = pd.read_csv(csv_file, **read_kwargs(schema, columns, input_columns))
+        check_numeric(frame, schema)
+        return frame
+    except (ValueError, TypeError):
+        report = invalid_numeric_report(csv_file, schema)
+        if not report["invalid_columns"]:
+            raise
+        raise SchemaValidationError(report)
@@ -0,0 +1,118 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+# ==========================
+# Pool Configuration
+# ==========================
+# "thread" shares the model registry with the API process; "process" isolates
+# CPU-heavy work from the GIL at the cost of one model copy per worker process.
+WORKER_POOL_KIND = os.getenv("WORKER_POOL_KIND", "thread")
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+# Jobs allowed to wait for a free worker before new ones are rejected with 429
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "8"))
+WORKER_JOB_TIMEOUT_SECONDS = float(os.getenv("WORKER_JOB_TIMEOUT_SECONDS", "300"))
+
+
+class PoolSaturatedError(RuntimeError):
+    pass
+
+
+class JobTimeoutError(TimeoutError):
+    pass
+
+
+class BoundedWorkerPool:
+    """
+    Executor with a hard cap on running + queued jobs.
+
+    A slot is taken when a job is submitted and released when the job actually
+    finishes, so a job that timed out from the caller's point of view still
+    counts against the limit until its worker is free again.
+    """
+
+    def __init__(self, kind: str = WORKER_POOL_KIND, size: int = WORKER_POOL_SIZE, queue_size: int = WORKER_QUEUE_SIZE):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported worker pool kind: {kind}. Use 'thread' or 'process'.")
+        self.kind = kind
+        self.size = size
+        self.capacity = size + queue_size
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.size)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="worker")
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue `fn` on the pool, raising PoolSaturatedError if it is full.
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise PoolSaturatedError(f"Worker pool is saturated ({self._in_flight}/{self.capacity} jobs)")
+            self._in_flight += 1
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args: Any, timeout: Optional[float] = WORKER_JOB_TIMEOUT_SECONDS, **kwargs: Any) -> Any:
+        """
+        Run `fn` on the pool and await its result without blocking the event loop.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # Only succeeds if the job has not started yet
+            raise JobTimeoutError(f"Job did not finish within {timeout} seconds")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = BoundedWorkerPool()
+
+
+async def run_blocking(fn: Callable, *args: Any, timeout: Optional[float] = WORKER_JOB_TIMEOUT_SECONDS,
+                       worker_pool: Optional[BoundedWorkerPool] = None, **kwargs: Any) -> Any:
+    """
+    Route helper: run a CPU-bound function on `worker_pool` (the shared pool by
+    default), mapping saturation to 429 and timeouts to 504.
+    """
+    try:
+        return await (worker_pool or pool).run(fn, *args, timeout=timeout, **kwargs)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server is busy processing other jobs, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
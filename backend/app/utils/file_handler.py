@@ -1,7 +1,191 @@
+import os
+import uuid
+import zlib
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
 import pandas as pd
+from fastapi import HTTPException, UploadFile, status
+
+# Size of each read from an incoming upload; the whole file is never held in memory
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Uploads are spooled here under a unique name per request, then deleted
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+# Largest CSV accepted, counted after decompression (0 disables the limit)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(1024 ** 3)))  # 1 GiB
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSED_SUFFIXES = (".gz", ".gzip", ".zst", ".zstd")
+
+class UploadTooLargeError(ValueError):
+    pass
+
+class UnsupportedUploadError(ValueError):
+    pass
 
 def save_csv(df, path):
     df.to_csv(path, index=False)
 
 def load_csv(path):
     return pd.read_csv(path)
+
+class _SpoolWriter:
+    """
+    File sink that hashes what it writes and enforces the size limit as the
+    bytes arrive, so an oversized (or decompression-bomb) upload stops early.
+    """
+
+    def __init__(self, f, max_bytes: int):
+        self.f = f
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.written += len(data)
+        if self.max_bytes and self.written > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the {self.max_bytes} byte limit")
+        self.f.write(data)
+        self.digest.update(data)
+        return len(data)
+
+def _detect_compression(head: bytes) -> Optional[str]:
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+class _GzipDecoder:
+    """
+    Streaming gzip decoder (multi-member files included) with bounded output per call.
+    """
+
+    def __init__(self, sink: _SpoolWriter, chunk_size: int):
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._in_member = False
+
+    def write(self, data: bytes) -> None:
+        try:
+            while data:
+                self._in_member = True
+                self.sink.write(self._decoder.decompress(data, self.chunk_size))
+                data = self._decoder.unconsumed_tail
+                if self._decoder.eof:
+                    # Concatenated gzip members: start over on whatever follows
+                    data = self._decoder.unused_data
+                    self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    self._in_member = False
+        except zlib.error as e:
+            raise UnsupportedUploadError(f"Corrupt gzip upload: {e}")
+
+    def close(self) -> None:
+        self.sink.write(self._decoder.flush())
+        if self._in_member and not self._decoder.eof:
+            raise UnsupportedUploadError("Truncated gzip upload")
+
+class _ZstdDecoder:
+    """
+    Streaming zstd decoder; needs the optional `zstandard` package.
+    """
+
+    def __init__(self, sink: _SpoolWriter, chunk_size: int):
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedUploadError("zstd-compressed uploads require the zstandard package on the server")
+        self._error = zstandard.ZstdError
+        self._writer = zstandard.ZstdDecompressor().stream_writer(sink, write_size=chunk_size, closefd=False)
+
+    def write(self, data: bytes) -> None:
+        try:
+            self._writer.write(data)
+        except self._error as e:
+            raise UnsupportedUploadError(f"Corrupt zstd upload: {e}")
+
+    def close(self) -> None:
+        self._writer.close()
+
+async def save_upload(file: UploadFile, path: str, chunk_size: int = UPLOAD_CHUNK_BYTES,
+                      max_bytes: int = UPLOAD_MAX_BYTES) -> tuple:
+    """
+    Copy an uploaded file to `path` chunk by chunk, decompressing gzip or zstd
+    uploads (detected from their magic bytes) on the way.
+    Returns (bytes written, SHA-256 hex digest of the decompressed content).
+    Raises UploadTooLargeError once more than `max_bytes` would be written.
+    """
+    try:
+        with open(path, "wb") as f:
+            sink = _SpoolWriter(f, max_bytes)
+            decoder = None
+            while chunk := await file.read(chunk_size):
+                if decoder is None:
+                    compression = _detect_compression(chunk)
+                    if compression == "gzip":
+                        decoder = _GzipDecoder(sink, chunk_size)
+                    elif compression == "zstd":
+                        decoder = _ZstdDecoder(sink, chunk_size)
+                    else:
+                        decoder = sink
+                decoder.write(chunk)
+            if decoder is not None and decoder is not sink:
+                decoder.close()
+    except BaseException:
+        _remove(path)
+        raise
+    return sink.written, sink.digest.hexdigest()
+
+def upload_file_name(file: UploadFile) -> str:
+    """
+    Client-side file name without directories or a compression suffix
+    (`extract.csv.gz` -> `extract.csv`).
+    """
+    name = os.path.basename(file.filename or "upload.csv")
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.lower().endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+    return name
+
+async def save_upload_or_4xx(file: UploadFile, path: str) -> tuple:
+    """
+    `save_upload` for routes: size and encoding errors become 413 / 415.
+    """
+    try:
+        return await save_upload(file, path)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnsupportedUploadError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+
+@dataclass
+class SpooledUpload:
+    path: str
+    file_name: str
+    size_bytes: int
+    sha256: str
+
+    def discard(self) -> None:
+        _remove(self.path)
+
+async def spool_upload(file: UploadFile, directory: str = UPLOAD_DIR) -> SpooledUpload:
+    """
+    Save an upload under a unique name in `directory`; call `discard()` once
+    it has been scored. Concurrent uploads with the same file name never
+    touch each other's files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.csv")
+    size_bytes, sha256 = await save_upload_or_4xx(file, path)
+    return SpooledUpload(path=path, file_name=upload_file_name(file), size_bytes=size_bytes, sha256=sha256)
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
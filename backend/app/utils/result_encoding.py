@@ -0,0 +1,102 @@
+import io
+import json
+from enum import Enum
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+# records  → [{col: val, ...}, ...] (the original /csv layout)
+# columnar → {"columns": [...], "data": {col: [...]}}; far fewer Python objects to build and send
+# arrow / parquet → binary bodies; metadata travels in the X-Result-Meta header
+class ResultFormat(str, Enum):
+    records = "records"
+    columnar = "columnar"
+    arrow = "arrow"
+    parquet = "parquet"
+
+def parse_columns(columns: Optional[str]) -> Optional[List[str]]:
+    """
+    Turn a comma-separated `columns` query parameter into a list.
+    """
+    if not columns:
+        return None
+    return [c.strip() for c in columns.split(",") if c.strip()]
+
+def check_columns(columns: List[str], available: List[str]) -> None:
+    """
+    Reject a projection that names columns the result does not have (400).
+    """
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Unknown columns requested", "unknown_columns": unknown,
+                    "available_columns": list(available)},
+        )
+
+def select_page(df: pd.DataFrame, offset: int = 0, limit: Optional[int] = None,
+                columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Slice rows and project columns without copying the rest of the frame.
+    """
+    if columns:
+        check_columns(columns, list(df.columns))
+        df = df[columns]
+    end = None if limit is None else offset + limit
+    return df.iloc[offset:end]
+
+def _json_safe(series: pd.Series) -> list:
+    # float32 → Python float would expose binary noise (80736.37 → 80736.3671875);
+    # going through the shortest float32 repr keeps the value the user uploaded
+    if series.dtype == "float32":
+        series = series.astype(str).astype("float64")
+    # NaN is not valid JSON; send null instead
+    if series.hasnans:
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+JSON_FORMATS = (ResultFormat.records, ResultFormat.columnar)
+
+def frame_payload(df: pd.DataFrame, fmt: ResultFormat = ResultFormat.records) -> dict:
+    """
+    JSON body fields for a page of results in one of the `JSON_FORMATS`.
+    """
+    if fmt == ResultFormat.records:
+        data = {col: _json_safe(df[col]) for col in df.columns}
+        return {"records": [dict(zip(data.keys(), row)) for row in zip(*data.values())]}
+    if fmt == ResultFormat.columnar:
+        return {"columns": list(df.columns), "data": {col: _json_safe(df[col]) for col in df.columns}}
+    raise ValueError(f"{fmt.value} is not a JSON format")
+
+def encode_frame(df: pd.DataFrame, fmt: ResultFormat = ResultFormat.records, meta: Optional[dict] = None) -> Response:
+    """
+    Serialise a page of results in the requested format.
+    """
+    meta = meta or {}
+
+    if fmt in JSON_FORMATS:
+        return JSONResponse(content={**meta, **frame_payload(df, fmt)})
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(status_code=501, detail=f"The '{fmt.value}' format requires pyarrow to be installed on the server")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    buf = io.BytesIO()
+    if fmt == ResultFormat.arrow:
+        with pa.ipc.new_stream(buf, table.schema) as writer:
+            writer.write_table(table)
+        media_type = "application/vnd.apache.arrow.stream"
+    else:
+        pq.write_table(table, buf, compression="zstd")
+        media_type = "application/vnd.apache.parquet"
+
+    return Response(
+        content=buf.getvalue(),
+        media_type=media_type,
+        headers={"X-Result-Meta": json.dumps(meta, default=str)},
+    )
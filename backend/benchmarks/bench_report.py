@@ -0,0 +1,83 @@
+"""
+Per-report latency of generate_report on synthetic /csv-style payloads.
+
+    cd backend && python -m benchmarks.bench_report --rows 10000 100000 1000000
+
+"cold" renders every chart; "warm" repeats the same payload so the charts
+come from the per-distribution cache. Results are printed as JSON.
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import List, Optional
+
+import numpy as np
+
+from app.services import report_service
+
+
+def synthetic_records(rows: int, seed: int = 0) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    probabilities = rng.beta(2, 5, size=rows).round(4)
+    ages = rng.integers(18, 80, size=rows)
+    balances = rng.gamma(2.0, 25000.0, size=rows).round(2)
+    return [
+        {
+            "User_ID": f"U{i + 1:04d}",
+            "Age": int(age),
+            "Balance": float(balance),
+            "Predicted_Target": int(p >= 0.5),
+            "churn_probability": float(p),
+        }
+        for i, (age, balance, p) in enumerate(zip(ages, balances, probabilities))
+    ]
+
+
+def time_report(payload: dict, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        report_service.generate_report(payload)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench(rows: int, repeat: int) -> dict:
+    payload = {
+        "records": synthetic_records(rows),
+        "model_used": "benchmark",
+        "file_name": f"synthetic_{rows}.csv",
+        "prediction_column": "Predicted_Target",
+    }
+    report_service._cached_pie_chart.cache_clear()
+    report_service._cached_histogram.cache_clear()
+    cold = time_report(payload, 1)[0]
+    warm = time_report(payload, repeat)
+    return {
+        "rows": rows,
+        "cold_seconds": round(cold, 4),
+        "warm_median_seconds": round(statistics.median(warm), 4),
+        "warm_min_seconds": round(min(warm), 4),
+        "repeat": repeat,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_report")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = {"benchmark": "generate_report", "results": [bench(rows, args.repeat) for rows in args.rows]}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files produced by `benchmarks.run`.
+
+    python -m benchmarks.compare bench-base.json bench-new.json --threshold 0.10
+
+Cases are matched on (benchmark, model_choice, rows, extra_columns) and
+compared on median latency. Exits with status 1 if any case is slower than
+the baseline by more than `--threshold`.
+"""
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+KEY_FIELDS = ("benchmark", "model_choice", "rows", "extra_columns")
+
+
+def _index(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return {tuple(result.get(k) for k in KEY_FIELDS): result for result in report["results"]}
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> List[dict]:
+    base, new = _index(base_path), _index(new_path)
+    rows = []
+    for key in sorted(base.keys() & new.keys(), key=lambda k: tuple("" if v is None else str(v) for v in k)):
+        before = base[key]["seconds"]["median"]
+        after = new[key]["seconds"]["median"]
+        change = (after - before) / before if before else None
+        rows.append({
+            **dict(zip(KEY_FIELDS, key)),
+            "base_median": before,
+            "new_median": after,
+            "change": round(change, 4) if change is not None else None,
+            "regression": change is not None and change > threshold,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown of the median")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    rows = compare(args.base, args.new, args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['benchmark']:<16} {row['model_choice'] or '':<20} rows={row['rows']} "
+                  f"cols+={row['extra_columns']} {row['base_median']:.4f}s -> {row['new_median']:.4f}s ({change}){flag}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
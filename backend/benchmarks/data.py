@@ -0,0 +1,71 @@
+"""
+Synthetic churn data and small stand-in models for the benchmarks.
+
+The frames follow the upload contract of the real models (ID, feature
+columns, Target) and the models are trained on the same feature names, so
+the schema, registry and scoring paths run exactly as in production.
+"""
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+BASE_FEATURES = ["Age", "Tenure", "Balance", "Gender", "Geography"]
+CATEGORICAL_FEATURES = ["Gender", "Geography"]
+
+MODEL_FILES = ("catboost_model.cbm", "life_insurance.cbm", "automobile_insurance.joblib")
+
+
+def feature_columns(extra_columns: int = 0) -> List[str]:
+    return BASE_FEATURES + [f"Feature_{i + 1}" for i in range(extra_columns)]
+
+
+def make_churn_frame(rows: int, extra_columns: int = 0, seed: int = 0) -> pd.DataFrame:
+    """
+    A churn-shaped frame with `extra_columns` additional numeric features.
+    """
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "ID": np.arange(rows),
+        "Age": rng.integers(18, 80, rows),
+        "Tenure": rng.integers(0, 10, rows),
+        "Balance": rng.normal(5e4, 2e4, rows).round(2),
+        "Gender": rng.choice(["Male", "Female"], rows),
+        "Geography": rng.choice(["FR", "DE", "ES"], rows),
+    })
+    for i in range(extra_columns):
+        frame[f"Feature_{i + 1}"] = rng.normal(0, 1, rows).round(4)
+    frame["Target"] = (rng.random(rows) < 0.3).astype(int)
+    return frame
+
+
+def write_csv(path: str, rows: int, extra_columns: int = 0, seed: int = 0) -> str:
+    make_churn_frame(rows, extra_columns, seed).to_csv(path, index=False)
+    return path
+
+
+def train_models(models_dir: str, extra_columns: int = 0, train_rows: int = 2000, seed: int = 0) -> str:
+    """
+    Train CatBoost (General, Life_Insurance) and scikit-learn (Automobile_Insurance)
+    stand-ins into `models_dir` under the file names the API expects.
+    """
+    from catboost import CatBoostClassifier
+    from sklearn.ensemble import RandomForestClassifier
+    import joblib
+
+    os.makedirs(models_dir, exist_ok=True)
+    frame = make_churn_frame(train_rows, extra_columns, seed)
+    features = feature_columns(extra_columns)
+
+    catboost_model = CatBoostClassifier(iterations=50, depth=6, verbose=0, random_seed=seed, cat_features=CATEGORICAL_FEATURES)
+    catboost_model.fit(frame[features], frame["Target"])
+    catboost_model.save_model(os.path.join(models_dir, "catboost_model.cbm"))
+    catboost_model.save_model(os.path.join(models_dir, "life_insurance.cbm"))
+
+    # The sklearn model only sees numeric features; fitting on a DataFrame sets feature_names_in_
+    numeric = [c for c in features if c not in CATEGORICAL_FEATURES]
+    forest = RandomForestClassifier(n_estimators=50, max_depth=8, random_state=seed, n_jobs=1)
+    forest.fit(frame[numeric], frame["Target"])
+    joblib.dump(forest, os.path.join(models_dir, "automobile_insurance.joblib"))
+    return models_dir
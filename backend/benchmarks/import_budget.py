@@ -0,0 +1,93 @@
+"""
+Import-time budget for the API.
+
+    cd backend
+    python -m benchmarks.import_budget --budget 1.5
+
+Imports `app.main` in fresh interpreters (`--repeat` times) inside a scratch
+directory and reports the median wall time, the slowest top-level imports
+from `python -X importtime`, and any subsystem that should load lazily but
+was imported eagerly. Exits with status 1 if the median exceeds `--budget`
+seconds or a lazy subsystem leaked into the import.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use or by the startup prewarm, never by `import app.main`
+LAZY_MODULES = ("catboost", "sklearn", "joblib", "matplotlib", "fpdf", "google.generativeai", "passlib")
+
+PROBE = (
+    "import sys, time, json\n"
+    "started = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - started\n"
+    f"print(json.dumps({{'seconds': elapsed, 'eager': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))\n"
+)
+
+
+def _probe(workdir: str, importtime: bool = False) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'budget.db')}",
+        "LOG_LEVEL": "WARNING",
+    }
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        result["importtime"] = completed.stderr
+    return result
+
+
+def slowest_imports(importtime: str, top: int = 10) -> List[dict]:
+    """
+    Top-level packages by cumulative import time, from `-X importtime` output.
+    """
+    packages = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    ordered = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": name, "cumulative_seconds": round(us / 1e6, 4)} for name, us in ordered]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_budget")
+    parser.add_argument("--budget", type=float, default=1.5, help="Allowed median seconds to import app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="churn-import-") as workdir:
+        _probe(workdir)  # Warm the OS page cache and __pycache__
+        runs = [_probe(workdir) for _ in range(args.repeat)]
+        profile = _probe(workdir, importtime=True)
+
+    median = statistics.median(run["seconds"] for run in runs)
+    eager = sorted({module for run in runs for module in run["eager"]})
+    report = {
+        "budget_seconds": args.budget,
+        "median_seconds": round(median, 4),
+        "runs_seconds": [round(run["seconds"], 4) for run in runs],
+        "eager_lazy_modules": eager,
+        "slowest_imports": slowest_imports(profile["importtime"], args.top),
+        "within_budget": median <= args.budget and not eager,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
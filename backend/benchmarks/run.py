@@ -0,0 +1,266 @@
+"""
+Reproducible benchmark suite for scoring, serialization, reporting and login.
+
+    cd backend
+    python -m benchmarks.run --rows 10000 100000 --extra-columns 0 20 --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.compare bench-old.json bench-new.json
+
+Everything runs against synthetic CSVs and locally trained stand-in models
+(see benchmarks/data.py) inside a scratch directory, so no real models,
+database or network access are needed. Each case is timed `--repeat` times
+after a warm-up run; one extra run under tracemalloc records peak Python-heap
+allocations (numpy/pandas buffers included, native CatBoost memory not).
+"""
+import os
+import sys
+import json
+import time
+import platform
+import asyncio
+import argparse
+import tempfile
+import resource
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Callable, List, Optional
+
+from benchmarks import data
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = ("predict_from_csv", "csv_route", "predict_rows", "generate_report", "login")
+PACKAGES = ("fastapi", "pandas", "numpy", "catboost", "scikit-learn", "fpdf2", "matplotlib", "passlib", "bcrypt")
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ordered = sorted(timings)
+    return {
+        "seconds": {
+            "min": round(ordered[0], 6),
+            "median": round(statistics.median(ordered), 6),
+            "p95": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 6),
+            "mean": round(statistics.fmean(ordered), 6),
+            "max": round(ordered[-1], 6),
+        },
+        "peak_traced_bytes": peak,
+    }
+
+
+def _result(benchmark: str, stats: dict, repeat: int, rows: Optional[int] = None, **params) -> dict:
+    median = stats["seconds"]["median"]
+    return {
+        "benchmark": benchmark,
+        **params,
+        "rows": rows,
+        "repeat": repeat,
+        **stats,
+        "rows_per_sec": round(rows / median, 1) if rows and median > 0 else None,
+    }
+
+
+def _row_burst(records: List[dict], model_name: str, concurrency: int) -> Callable[[], None]:
+    """
+    One run = every record sent as its own /predict/rows request, with at most
+    `concurrency` in flight, through the micro-batcher.
+    """
+    from app.services.micro_batcher import score_records
+
+    async def burst():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(record):
+            async with semaphore:
+                await score_records([record], model_name)
+        await asyncio.gather(*(one(record) for record in records))
+    return lambda: asyncio.run(burst())
+
+
+def _git_revision() -> Optional[dict]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=os.path.dirname(BENCHMARKS_DIR),
+                               capture_output=True, text=True, check=True).stdout.strip() != ""
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {"commit": commit, "dirty": dirty}
+
+
+def _environment() -> dict:
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def _configure_environment(workdir: str, models_dir: str, bcrypt_rounds: int) -> None:
+    """
+    Point every app setting read at import time at the scratch directory.
+    Must run before any `app` module is imported.
+    """
+    os.environ.update({
+        "MODELS_DIR": models_dir,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "RESULT_CACHE_ENABLED": "false",  # Measure scoring, not cache hits
+        "RESULT_CACHE_DIR": os.path.join(workdir, "cache"),
+        "JOBS_DIR": os.path.join(workdir, "jobs"),
+        "CHATBOT_PROVIDER": "stub",
+        "BCRYPT_ROUNDS": str(bcrypt_rounds),
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    })
+
+
+def run_suite(args: argparse.Namespace, workdir: str) -> List[dict]:
+    models_dir = os.path.join(workdir, "models")
+    _configure_environment(workdir, models_dir, args.bcrypt_rounds)
+    os.chdir(workdir)  # uploads/ and outputs/ are created relative to the working directory
+    data.train_models(models_dir, extra_columns=0)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.model_service import MODEL_MAPPING, ModelChoice, predict_from_csv
+    from app.services import report_service
+    from benchmarks.bench_report import synthetic_records
+
+    choices = [ModelChoice(choice) for choice in args.models]
+    selected = set(args.benchmarks)
+    results = []
+
+    def log(result: dict) -> None:
+        seconds = result["seconds"]["median"]
+        print(f"[bench] {result['benchmark']:<16} {result.get('model_choice') or '':<20} rows={result['rows']} "
+              f"cols+={result.get('extra_columns')} median={seconds:.4f}s", file=sys.stderr)
+        results.append(result)
+
+    with TestClient(app) as client:
+        client.post("/auth/register", params={"username": "bench", "email": "bench@example.com", "password": "bench"})
+        token = client.post("/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        if "login" in selected:
+            def login():
+                response = client.post("/auth/login", data={"username": "bench", "password": "bench"})
+                response.raise_for_status()
+            log(_result("login", measure(login, args.repeat), args.repeat, bcrypt_rounds=args.bcrypt_rounds))
+
+        for extra_columns in args.extra_columns:
+            data.train_models(models_dir, extra_columns=extra_columns)
+            for rows in args.rows:
+                csv_path = data.write_csv(os.path.join(workdir, f"churn_{rows}_{extra_columns}.csv"), rows, extra_columns)
+                for choice in choices:
+                    model_name = MODEL_MAPPING[choice]
+                    params = {"model_choice": choice.value, "extra_columns": extra_columns}
+
+                    if "predict_from_csv" in selected:
+                        stats = measure(lambda: predict_from_csv(csv_path, model_name), args.repeat)
+                        log(_result("predict_from_csv", stats, args.repeat, rows, **params))
+
+                    if "csv_route" in selected:
+                        def post_csv():
+                            with open(csv_path, "rb") as f:
+                                response = client.post(
+                                    "/csv", data={"model_choice": choice.value},
+                                    files={"file": (os.path.basename(csv_path), f, "text/csv")}, headers=headers,
+                                )
+                            response.raise_for_status()
+                        log(_result("csv_route", measure(post_csv, args.repeat), args.repeat, rows, **params))
+
+                    if "predict_rows" in selected:
+                        burst_rows = min(rows, args.row_burst)
+                        records = data.make_churn_frame(burst_rows, extra_columns).drop(columns="Target").to_dict("records")
+                        stats = measure(_row_burst(records, model_name, args.row_concurrency), args.repeat)
+                        log(_result("predict_rows", stats, args.repeat, burst_rows, **params,
+                                    concurrency=args.row_concurrency))
+
+            if "generate_report" in selected and extra_columns == args.extra_columns[0]:
+                for rows in args.rows:
+                    payload = {
+                        "records": synthetic_records(rows),
+                        "model_used": "benchmark",
+                        "file_name": f"synthetic_{rows}.csv",
+                        "prediction_column": "Predicted_Target",
+                    }
+
+                    def render():
+                        # Cold charts every time: the worst case for a new result
+                        report_service._cached_pie_chart.cache_clear()
+                        report_service._cached_histogram.cache_clear()
+                        report_service.generate_report(payload)
+                    log(_result("generate_report", measure(render, args.repeat), args.repeat, rows))
+    return results
+
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the backend benchmark suite.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--extra-columns", type=int, nargs="+", default=[0],
+                        help="Additional numeric feature columns per dataset (models are retrained to match)")
+    parser.add_argument("--models", nargs="+", default=["General", "Automobile_Insurance"],
+                        choices=["General", "Life_Insurance", "Automobile_Insurance"])
+    parser.add_argument("--benchmarks", nargs="+", default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--row-burst", type=int, default=5000, help="Single-row requests per predict_rows run (at most --rows)")
+    parser.add_argument("--row-concurrency", type=int, default=64, help="Concurrent single-row requests in predict_rows")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="bcrypt cost used by the login benchmark")
+    parser.add_argument("--output", default=None, help="Write the JSON results here (default: stdout only)")
+    parser.add_argument("--workdir", default=None, help="Scratch directory to keep (default: a temporary one)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    started_at = datetime.now(timezone.utc).isoformat()
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_suite(args, os.path.abspath(args.workdir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="churn-bench-") as workdir:
+            results = run_suite(args, workdir)
+
+    report = {
+        "suite": "churn-backend",
+        "started_at": started_at,
+        "git": _git_revision(),
+        "environment": _environment(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "workdir")},
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Test setup: a throwaway working directory, SQLite database and a small
+CatBoost model trained on the fly, configured before `app` is imported.
+"""
+import os
+import tempfile
+
+WORK_DIR = tempfile.mkdtemp(prefix="churn-tests-")
+MODELS_DIR = os.path.join(WORK_DIR, "models")
+os.makedirs(MODELS_DIR)
+os.environ.update({
+    "MODELS_DIR": MODELS_DIR,
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORK_DIR, 'users.db')}",
+    "RESULT_STORE_DIR": os.path.join(WORK_DIR, "results"),
+    "OUTPUT_DIR": os.path.join(WORK_DIR, "outputs"),
+    "JOBS_DIR": os.path.join(WORK_DIR, "jobs"),
+    "RESULT_CACHE_DIR": os.path.join(WORK_DIR, "cache", "results"),
+    "UPLOAD_DIR": os.path.join(WORK_DIR, "uploads"),
+    "PREWARM_IN_BACKGROUND": "false",
+    "CHATBOT_PROVIDER": "stub",
+})
+
+import numpy as np
+import pandas as pd
+import pytest
+
+FEATURES = ["Age", "SeniorCitizen", "Geography"]
+
+
+def make_customers(n: int = 200, seed: int = 0) -> pd.DataFrame:
+    """
+    Customers with a numeric, an int-coded categorical and a string categorical feature.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ID": np.arange(n),
+        "Age": rng.integers(18, 90, n),
+        "SeniorCitizen": rng.integers(0, 2, n),
+        "Geography": rng.choice(["FR", "DE", "ES"], n),
+    })
+
+
+def _train_model(path: str) -> None:
+    from catboost import CatBoostClassifier
+
+    data = make_customers(500, seed=1)
+    features = data[FEATURES].astype({"SeniorCitizen": str})
+    target = (data["Age"] > 60).astype(int) | data["SeniorCitizen"]
+    model = CatBoostClassifier(iterations=20, depth=3, verbose=False, random_seed=0, allow_writing_files=False)
+    model.fit(features, target, cat_features=["SeniorCitizen", "Geography"])
+    model.save_model(path)
+
+
+_train_model(os.path.join(MODELS_DIR, "catboost_model.cbm"))
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    client.post("/auth/register", params={"username": "tester", "email": "tester@example.com", "password": "secret"})
+    response = client.post("/auth/login", data={"username": "tester", "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def customers_csv():
+    return make_customers().to_csv(index=False).encode()
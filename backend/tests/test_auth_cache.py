@@ -0,0 +1,17 @@
+import re
+
+
+def _lookups(client, result):
+    body = client.get("/metrics").text
+    return float(re.search(rf'churn_auth_cache_lookups_total{{result="{result}"}} (\S+)', body).group(1))
+
+
+def test_principal_cache_hits_and_misses_reach_metrics(client, auth_headers):
+    client.get("/models", headers=auth_headers)  # Cached from here on
+    hits, misses = _lookups(client, "hit"), _lookups(client, "miss")
+
+    client.get("/models", headers=auth_headers)
+    client.get("/models", headers={"Authorization": "Bearer not-a-token"})
+
+    assert _lookups(client, "hit") == hits + 1
+    assert _lookups(client, "miss") == misses + 1
@@ -0,0 +1,36 @@
+from tests.conftest import make_customers
+
+
+def _upload(client, headers, content, file_name="customers.csv", **form):
+    return client.post(
+        "/csv", data={"model_choice": "General", **form},
+        files={"file": (file_name, content, "text/csv")}, headers=headers,
+    )
+
+
+def test_int_coded_categorical_round_trips(client, auth_headers, customers_csv):
+    uploaded = make_customers()
+
+    response = _upload(client, auth_headers, customers_csv)
+    assert response.status_code == 200
+    records = response.json()["records"]
+    assert [r["SeniorCitizen"] for r in records] == uploaded["SeniorCitizen"].tolist()
+    assert [r["Age"] for r in records] == uploaded["Age"].tolist()
+
+    # The stored rows keep the uploaded values too
+    stored = client.get(f"/results/{response.json()['result_id']}", params={"columns": "SeniorCitizen"}, headers=auth_headers)
+    assert stored.status_code == 200
+    assert [r["SeniorCitizen"] for r in stored.json()["records"]] == uploaded["SeniorCitizen"].tolist()
+
+
+def test_renamed_reupload_hits_result_cache(client, auth_headers, customers_csv):
+    from app.services.result_cache import result_cache
+
+    # A threshold no other test uses, so the first upload is a miss
+    first = _upload(client, auth_headers, customers_csv, file_name="january.csv", threshold="0.4")
+    hits = result_cache.hits
+    second = _upload(client, auth_headers, customers_csv, file_name="january-copy.csv", threshold="0.4")
+    assert first.status_code == second.status_code == 200
+    assert result_cache.hits == hits + 1
+    assert second.json()["records"] == first.json()["records"]
+    assert second.json()["result_id"] != first.json()["result_id"]